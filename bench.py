@@ -0,0 +1,341 @@
+# End-to-end benchmark of the slash commands, run against the local Riot stand-in (fake_riot.py).
+#
+#   python bench.py --concurrency 8 --iterations 50 --latency 40 --output bench_results.json
+#   python bench.py --compare bench_results.json    # Exits 1 if a command's p95 regressed
+#
+# Each registered command callback is driven with fake interactions, so everything from the
+# callback down (caches, rate limiter, Riot client, formatting) runs as in production.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import logging
+
+BENCH_COMMANDS = ["match_history", "rank", "clash", "clash_scout", "mastery", "stats", "jar", "show_jar"]
+LAG_INTERVAL = 0.01
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))]
+
+
+def summarize(values):
+    if not values:
+        return None
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "mean": sum(values) / len(values),
+        "max": max(values),
+    }
+
+
+class FakeMessage:
+    async def edit(self, **kwargs):
+        pass
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    def _respond(self):
+        if not self._done:
+            self._done = True
+            self.interaction.acknowledged_at = time.perf_counter()
+
+    async def defer(self, **kwargs):
+        self._respond()
+
+    async def send_message(self, content=None, **kwargs):
+        self._respond()
+        self.interaction.messages += 1
+
+    async def edit_message(self, **kwargs):
+        self._respond()
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        self.interaction.messages += 1
+        return FakeMessage()
+
+
+class FakeUser:
+    id = 1
+    name = "bench"
+
+    def __str__(self):
+        return self.name
+
+
+class FakeInteraction:
+    """Just enough of nextcord.Interaction for the command callbacks."""
+
+    def __init__(self, command, options):
+        self.application_command = command
+        self.data = {"name": command.name, "options": [{"name": k, "value": v} for k, v in options.items()]}
+        self.user = FakeUser()
+        self.guild = None
+        self.channel = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.messages = 0
+        self.acknowledged_at = None
+
+    async def edit_original_message(self, **kwargs):
+        return FakeMessage()
+
+
+def scenarios(players):
+    """Options for one invocation of each command, picked from the fixture players."""
+    return {
+        "match_history": lambda rng: {"riot_id": rng.choice(players), "match_count": 20},
+        "rank": lambda rng: {"riot_id": rng.choice(players)},
+        "clash": lambda rng: {"riot_id": rng.choice(players[:5])},
+        "clash_scout": lambda rng: {"riot_id": rng.choice(players[:5])},
+        "mastery": lambda rng: {"riot_id": rng.choice(players), "limit": 10},
+        "stats": lambda rng: {"riot_id": rng.choice(players), "games": 100},
+        "jar": lambda rng: {"number": 1},
+        "show_jar": lambda rng: {},
+    }
+
+
+async def measure_lag(samples, stop):
+    """Record how late the loop wakes up from short sleeps while the benchmark runs."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(0.0, time.perf_counter() - started - LAG_INTERVAL))
+
+
+async def run(args):
+    import fake_riot
+    import main as bot_main
+    from commands import data_dragon, metrics, riot_api
+    logging.getLogger().setLevel(logging.WARNING)  # Per-command INFO logs would drown the report
+
+    fake = fake_riot.FakeRiot(
+        latency=args.latency / 1000, jitter=args.jitter / 1000, rate_429=args.rate_429,
+        error_rate=args.error_rate, app_limit=args.app_limit, seed=args.seed,
+    )
+    runner = await fake_riot.serve(fake, port=args.port)
+    await data_dragon.ensure_loaded()
+
+    # Decorated commands normally reach the bot's state when it connects
+    bot_main.bot.add_all_application_commands()
+    commands = {command.name: command for command in bot_main.bot.get_all_application_commands()}
+    selected = args.commands or BENCH_COMMANDS
+    missing = [name for name in selected if name not in commands]
+    if missing:
+        raise SystemExit(f"Unknown commands: {', '.join(missing)}")
+
+    players = [f"{name}#NA1" for name in fake_riot.PLAYERS]
+    options_for = scenarios(players)
+    rng = random.Random(args.seed)
+    results = {name: {"latency": [], "defer": [], "riot_calls": [], "errors": 0} for name in selected}
+
+    async def invoke(name, record):
+        options = options_for[name](rng)
+        interaction = FakeInteraction(commands[name], options)
+        started = time.perf_counter()
+        failed = False
+        with metrics.command_invocation(name) as invocation:
+            try:
+                await commands[name](interaction, **options)
+            except Exception as e:
+                failed = True
+                print(f"/{name} {options} raised {type(e).__name__}: {e}", file=sys.stderr)
+        if not record:
+            return
+        result = results[name]
+        result["latency"].append(time.perf_counter() - started)
+        if interaction.acknowledged_at is not None:
+            result["defer"].append(interaction.acknowledged_at - started)
+        result["riot_calls"].append(invocation.riot_calls)
+        # Commands catch their own errors and reply with a message, which still counts as a failure
+        result["errors"] += failed or invocation.failed
+
+    for _ in range(args.warmup):
+        for name in selected:
+            await invoke(name, record=False)
+    upstream_before = sum(fake.requests.values())
+
+    # Every command `iterations` times, shuffled, shared by `concurrency` workers
+    queue = asyncio.Queue()
+    jobs = [name for name in selected for _ in range(args.iterations)]
+    rng.shuffle(jobs)
+    for name in jobs:
+        queue.put_nowait(name)
+
+    async def worker():
+        while not queue.empty():
+            await invoke(queue.get_nowait(), record=True)
+
+    lag = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(lag, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await lag_task
+
+    # Page prefetches, background refreshes and view timeouts outlive the commands that started them
+    leftovers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in leftovers:
+        task.cancel()
+    await asyncio.gather(*leftovers, return_exceptions=True)
+    await riot_api.close()
+    await runner.cleanup()
+
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "latency_ms": args.latency,
+            "jitter_ms": args.jitter,
+            "rate_429": args.rate_429,
+            "error_rate": args.error_rate,
+            "app_limit": args.app_limit,
+            "seed": args.seed,
+        },
+        "elapsed": elapsed,
+        "throughput": len(jobs) / elapsed,
+        "upstream_requests": sum(fake.requests.values()) - upstream_before,
+        "loop_lag": summarize(lag),
+        "commands": {
+            name: {
+                "count": len(result["latency"]),
+                "errors": result["errors"],
+                "latency": summarize(result["latency"]),
+                "defer": summarize(result["defer"]),
+                "riot_calls_mean": sum(result["riot_calls"]) / len(result["riot_calls"]) if result["riot_calls"] else 0,
+            }
+            for name, result in results.items()
+        },
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}ms"
+
+
+def print_report(report):
+    print(
+        f"{report['throughput']:.1f} commands/s over {report['elapsed']:.1f}s, "
+        f"{report['upstream_requests']} upstream requests"
+    )
+    print(f"{'command':<15}{'runs':>6}{'err':>5}{'p50':>11}{'p95':>11}{'p99':>11}{'defer p95':>11}{'riot/run':>10}")
+    for name, stats in report["commands"].items():
+        latency = stats["latency"] or {}
+        defer = stats["defer"] or {}
+        print(
+            f"{'/' + name:<15}{stats['count']:>6}{stats['errors']:>5}{_ms(latency.get('p50')):>11}"
+            f"{_ms(latency.get('p95')):>11}{_ms(latency.get('p99')):>11}{_ms(defer.get('p95')):>11}"
+            f"{stats['riot_calls_mean']:>10.1f}"
+        )
+    lag = report["loop_lag"] or {}
+    print(f"Event loop lag: p50 {_ms(lag.get('p50'))}, p99 {_ms(lag.get('p99'))}, max {_ms(lag.get('max'))}")
+
+
+def compare(baseline, report, threshold, min_delta):
+    """Print p95 changes against a baseline report. Returns the commands that regressed."""
+    regressed = []
+    print(f"\nAgainst baseline {baseline['meta'].get('commit')} ({baseline['meta'].get('time')}):")
+    for name, stats in report["commands"].items():
+        old = baseline["commands"].get(name)
+        if not old or not old["latency"] or not stats["latency"]:
+            continue
+        before, after = old["latency"]["p95"], stats["latency"]["p95"]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if after > before * (1 + threshold) and after - before > min_delta:
+            regressed.append(name)
+            flag = "  REGRESSED"
+        print(f"{'/' + name:<15} p95 {_ms(before):>10} -> {_ms(after):>10} ({change:+.0f}%){flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the slash commands against fake_riot.py.")
+    parser.add_argument("commands", nargs="*", help=f"Commands to run (default: {' '.join(BENCH_COMMANDS)})")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=30, help="Runs of each command")
+    parser.add_argument("--warmup", type=int, default=0, help="Unrecorded runs of each command first")
+    parser.add_argument("--latency", type=float, default=30.0, help="Fake Riot response time in milliseconds")
+    parser.add_argument("--jitter", type=float, default=10.0, help="Random +/- milliseconds on --latency")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--app-limit", default="20000:1,1000000:120",
+                        help="Application rate limit the fake enforces, e.g. 20:1,100:120 for a development key")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--compare", help="Baseline report to compare p95 latencies against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p95 increase over the baseline")
+    parser.add_argument("--min-delta", type=float, default=5.0,
+                        help="Ignore p95 increases smaller than this many milliseconds")
+    args = parser.parse_args()
+
+    # Point the bot at the fake before any of its modules read their settings, and keep its
+    # caches, log file and jar counter away from the real ones
+    work_dir = tempfile.mkdtemp(prefix="gggamers-bench-")
+    os.environ["RIOT_API_BASE_URL"] = f"http://127.0.0.1:{args.port}/{{host}}"
+    os.environ["DDRAGON_BASE_URL"] = f"http://127.0.0.1:{args.port}/ddragon"
+    os.environ["BOT_CACHE_DIR"] = os.path.join(work_dir, "cache")
+    os.environ["LOG_FILE"] = os.path.join(work_dir, "bot.log")
+    os.environ.setdefault("GUILD_IDS", "0")
+    from commands import jar_counter
+    jar_counter.JAR_FILE = os.path.join(work_dir, "jar_counter.json")
+    jar_counter.save_jar_count(0)
+
+    report = asyncio.run(run(args))
+    logging.shutdown()
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved report to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold, args.min_delta / 1000):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import threading
+import time
+import logging
+from commands import riot_api
+from commands import storage
+from commands import metrics
+
+logger = logging.getLogger("BotLogger")
+
+ACCOUNT_REGION = "americas"  # account-v1 is served from the regional host
+REGION = "na1"  # summoner-v4 is served from the platform host
+DEFAULT_TAG = "NA1"  # Tag used when a Riot ID is given without one
+
+# Players can rename, so Riot ID -> PUUID is refreshed daily. PUUID -> summoner never changes in practice.
+ACCOUNT_TTL = 24 * 60 * 60
+SUMMONER_TTL = 7 * 24 * 60 * 60
+
+# In-memory layer: key -> (fetched_at, data)
+_accounts = {}
+_accounts_by_puuid = {}
+_summoners = {}
+
+_conn = None
+_lock = threading.Lock()
+
+
+def parse_riot_id(riot_id):
+    """Parse a Riot ID in the format 'SummonerName#TAG' and return (name, tag). The tag defaults to NA1."""
+    name, _, tag = riot_id.strip().partition("#")
+    return name.strip(), tag.strip() or DEFAULT_TAG
+
+
+def cache_key(name, tag):
+    """Riot IDs are case-insensitive, so 'Faker#KR1' and 'faker#kr1' share one entry."""
+    return f"{name}#{tag}".casefold()
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = storage.connect("accounts.sqlite3")
+        for table, key in (("accounts", "riot_id"), ("accounts_by_puuid", "puuid"), ("summoners", "puuid")):
+            _conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                f" {key} TEXT PRIMARY KEY, data TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+        _conn.commit()
+    return _conn
+
+
+def _load(table, key_column, key):
+    with _lock:
+        row = _get_conn().execute(
+            f"SELECT data, fetched_at FROM {table} WHERE {key_column} = ?", (key,)
+        ).fetchone()
+    if row is None:
+        return None
+    return row[1], json.loads(row[0])
+
+
+def _save(table, key_column, key, data, fetched_at):
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {table} ({key_column}, data, fetched_at) VALUES (?, ?, ?)",
+            (key, json.dumps(data), fetched_at),
+        )
+        conn.commit()
+
+
+async def _cached(memory, table, key_column, key, ttl, fetch):
+    """Look a key up in memory, then on disk, then fetch it from Riot and remember it."""
+    now = time.time()
+    entry = memory.get(key)
+    if entry is None:
+        entry = await asyncio.to_thread(_load, table, key_column, key)
+        if entry is not None:
+            memory[key] = entry
+    if entry is not None and now - entry[0] < ttl:
+        metrics.record_cache(table, True)
+        return entry[1]
+
+    metrics.record_cache(table, False)
+
+    data = await fetch()
+    memory[key] = (now, data)
+    await asyncio.to_thread(_save, table, key_column, key, data, now)
+    return data
+
+
+async def get_account(riot_id, error_handler=None):
+    """Resolve a Riot ID to its account-v1 data (puuid, gameName, tagLine)."""
+    name, tag = parse_riot_id(riot_id)
+    return await _cached(
+        _accounts, "accounts", "riot_id", cache_key(name, tag), ACCOUNT_TTL,
+        lambda: riot_api.get(
+            ACCOUNT_REGION,
+            "/riot/account/v1/accounts/by-riot-id/{}/{}",
+            name, tag,
+            error_handler=error_handler,
+        ),
+    )
+
+
+async def get_account_by_puuid(puuid, error_handler=None):
+    """Resolve a PUUID to its account-v1 data, e.g. to name a player other endpoints only give IDs for."""
+    return await _cached(
+        _accounts_by_puuid, "accounts_by_puuid", "puuid", puuid, ACCOUNT_TTL,
+        lambda: riot_api.get(
+            ACCOUNT_REGION,
+            "/riot/account/v1/accounts/by-puuid/{}",
+            puuid,
+            error_handler=error_handler,
+        ),
+    )
+
+
+def display_name(account):
+    """Format account-v1 data as a Riot ID, 'Name#TAG'."""
+    return f"{account['gameName']}#{account['tagLine']}"
+
+
+async def get_summoner(puuid, error_handler=None):
+    """Resolve a PUUID to its summoner-v4 data (summoner ID, level, icon)."""
+    return await _cached(
+        _summoners, "summoners", "puuid", puuid, SUMMONER_TTL,
+        lambda: riot_api.get(
+            REGION,
+            "/lol/summoner/v4/summoners/by-puuid/{}",
+            puuid,
+            error_handler=error_handler,
+        ),
+    )
+
+
+async def get_summoner_by_riot_id(riot_id, error_handler=None):
+    """Resolve a Riot ID all the way to its summoner-v4 data."""
+    account = await get_account(riot_id, error_handler)
+    return await get_summoner(account["puuid"], error_handler)
@@ -1,9 +1,6 @@
-import openai
 import nextcord
 from nextcord.ext import commands
-import os
-# Load OpenAI API Key from environment variables
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from config import config
 
 
 def add_gpt_chat_command(bot, guild_ids):
@@ -16,6 +13,10 @@ def add_gpt_chat_command(bot, guild_ids):
         await interaction.response.defer()  # Defer response to prevent timeout
 
         try:
+            # Imported on first use, openai is slow to import and rarely needed
+            import openai
+            openai.api_key = config.openai_api_key
+
             # Use OpenAI's async ChatCompletion API
             response = await openai.ChatCompletion.acreate(
                 model="gpt-4",
@@ -0,0 +1,87 @@
+import nextcord
+import logging
+from commands import metrics
+from commands.embeds import send_lines
+
+logger = logging.getLogger("BotLogger")
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.0f}ms"
+
+
+def _by_label(series, label):
+    """Re-key a metric's series by one of its label values."""
+    return {dict(labels).get(label): value for labels, value in series.items()}
+
+
+def format_command_stats():
+    lines = []
+    durations = _by_label(metrics.histograms("bot_command_seconds"), "command")
+    acks = _by_label(metrics.histograms("bot_command_ack_seconds"), "command")
+    riot_calls = _by_label(metrics.histograms("bot_command_riot_calls"), "command")
+    errors = _by_label(metrics.counters("bot_command_errors_total"), "command")
+    # Busiest commands first
+    for command, histogram in sorted(durations.items(), key=lambda item: -item[1].count):
+        line = (
+            f"**/{command}** - {histogram.count} runs | p50 {_ms(histogram.quantile(0.5))} | "
+            f"p95 {_ms(histogram.quantile(0.95))} | p99 {_ms(histogram.quantile(0.99))}"
+        )
+        if command in acks:
+            line += f" | ack p95 {_ms(acks[command].quantile(0.95))}"
+        if command in riot_calls and riot_calls[command].sum:
+            line += f" | {riot_calls[command].sum / riot_calls[command].count:.1f} Riot calls/run"
+        if errors.get(command):
+            line += f" | {errors[command] / histogram.count * 100:.0f}% errors"
+        lines.append(line)
+    return lines or ["No commands handled yet."]
+
+
+def format_riot_stats():
+    totals = {}
+    failures = {}
+    for labels, value in metrics.counters("riot_requests_total").items():
+        labels = dict(labels)
+        endpoint = labels["endpoint"]
+        totals[endpoint] = totals.get(endpoint, 0) + value
+        if labels["status"] != "200":
+            failures[endpoint] = failures.get(endpoint, 0) + value
+
+    latencies = _by_label(metrics.histograms("riot_request_seconds"), "endpoint")
+    lines = []
+    for endpoint, total in sorted(totals.items(), key=lambda item: -item[1]):
+        line = f"`{endpoint}` - {total} calls"
+        if endpoint in latencies:
+            line += f" | p50 {_ms(latencies[endpoint].quantile(0.5))} | p95 {_ms(latencies[endpoint].quantile(0.95))}"
+        if failures.get(endpoint):
+            line += f" | {failures[endpoint] / total * 100:.0f}% failed"
+        lines.append(line)
+    return lines or ["No Riot API calls yet."]
+
+
+def format_cache_stats():
+    lookups = {}
+    for labels, value in metrics.counters("bot_cache_requests_total").items():
+        labels = dict(labels)
+        hits, total = lookups.get(labels["cache"], (0, 0))
+        lookups[labels["cache"]] = (hits + (value if labels["result"] == "hit" else 0), total + value)
+    lines = [
+        f"**{cache}** - {hits / total * 100:.0f}% hits ({hits}/{total})"
+        for cache, (hits, total) in sorted(lookups.items())
+    ]
+    return lines or ["No cache lookups yet."]
+
+
+def add_botstats_command(bot, GUILD_IDS):
+    @bot.slash_command(
+        name="botstats",
+        description="Show command latency, Riot API usage and cache hit rates since the bot started",
+        guild_ids=GUILD_IDS,
+        default_member_permissions=nextcord.Permissions(administrator=True),
+    )
+    async def botstats_command(interaction: nextcord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        lines = ["__**Commands**__", *format_command_stats()]
+        lines += ["", "__**Riot API**__", *format_riot_stats()]
+        lines += ["", "__**Caches**__", *format_cache_stats()]
+        await send_lines(interaction, "Bot stats", lines, ephemeral=True)
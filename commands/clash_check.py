@@ -1,15 +1,31 @@
-import requests
 import nextcord
-from dotenv import load_dotenv
-import os
 from datetime import datetime
+import asyncio
 import logging
+import time
+from commands import riot_api
+from commands import metrics
+from commands import account_resolver
+from commands import data_dragon
+from commands.embeds import send_error, send_lines
+from commands.match_history import get_match_history, get_match_summaries
+from commands.mastery import get_top_champion_mastery
+from commands.rank_check import get_league_entries
 
-# Load the .env file
-load_dotenv()
-
-RIOT_API_KEY = os.getenv("RIOT_API_KEY")
 REGION = "na1"  # Default region
+# Refetch the tournament list at least this often, even if no schedule time passes
+MAX_TOURNAMENT_TTL = 24 * 60 * 60
+# A team in a tournament we don't know forces a refetch, but no more often than this
+MIN_TOURNAMENT_REFRESH = 5 * 60
+
+# How long /clash_scout waits for the enemy team's data before sending what it has
+SCOUT_BUDGET = 10.0
+SCOUT_RECENT_GAMES = 5
+
+_tournaments = {}  # Tournament ID -> tournament
+_tournaments_expire_at = 0.0
+_tournaments_fetched_at = 0.0
+_background = set()  # Scout requests still running after their reply was sent
 
 logger = logging.getLogger("BotLogger")
 
@@ -23,90 +39,228 @@ def handle_api_error(response):
         return "Player not found in any active Clash teams."
     return f"An error occurred: {response.status_code} {response.reason}"
 
-def get_summoner_by_riot_id(name, tag):
+async def get_summoner_by_riot_id(riot_id):
     """Get summoner data using Riot ID."""
-    # First get PUUID
-    account_url = f"https://americas.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{name}/{tag}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-    
-    response = requests.get(account_url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(handle_api_error(response))
-    
-    puuid = response.json()["puuid"]
-    
-    # Then get summoner data
-    summoner_url = f"https://{REGION}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
-    response = requests.get(summoner_url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(handle_api_error(response))
-    
-    return response.json()
+    return await account_resolver.get_summoner_by_riot_id(riot_id, handle_api_error)
 
-def get_active_tournaments():
-    """Get list of active and upcoming Clash tournaments."""
-    url = f"https://{REGION}.api.riotgames.com/lol/clash/v1/tournaments"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-    
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(handle_api_error(response))
-    
-    return response.json()
+def next_schedule_change(tournaments, now):
+    """Return the next registration or start time (epoch seconds) in the tournament schedules."""
+    upcoming = [
+        moment / 1000
+        for tournament in tournaments
+        for phase in tournament.get("schedule", [])
+        for moment in (phase["registrationTime"], phase["startTime"])
+        if moment / 1000 > now
+    ]
+    return min(upcoming, default=now + MAX_TOURNAMENT_TTL)
+
+async def get_active_tournaments(tournament_id=None):
+    """Get active and upcoming Clash tournaments keyed by ID.
+
+    The list only changes when a tournament opens registration or starts,
+    so it is cached until the next of those times in the schedules. A
+    newly announced tournament isn't in that schedule though, so asking for
+    a `tournament_id` the cache doesn't have refetches the list (at most
+    every MIN_TOURNAMENT_REFRESH seconds).
+    """
+    global _tournaments, _tournaments_expire_at, _tournaments_fetched_at
+    now = time.time()
+    missing = tournament_id is not None and tournament_id not in _tournaments
+    if now < _tournaments_expire_at and not (missing and now - _tournaments_fetched_at >= MIN_TOURNAMENT_REFRESH):
+        metrics.record_cache("clash_tournaments", True)
+        return _tournaments
+    metrics.record_cache("clash_tournaments", False)
+
+    tournaments = await riot_api.get(
+        REGION,
+        "/lol/clash/v1/tournaments",
+        error_handler=handle_api_error,
+    )
+    _tournaments = {tournament["id"]: tournament for tournament in tournaments}
+    _tournaments_expire_at = min(next_schedule_change(tournaments, now), now + MAX_TOURNAMENT_TTL)
+    _tournaments_fetched_at = now
+    return _tournaments
 
-def get_clash_team_by_summoner(summoner_id):
+async def get_clash_team_by_summoner(summoner_id):
     """Get Clash team data for a summoner."""
-    url = f"https://{REGION}.api.riotgames.com/lol/clash/v1/players/by-summoner/{summoner_id}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-    
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(handle_api_error(response))
-    
-    player_data = response.json()
+    player_data = await riot_api.get(
+        REGION,
+        "/lol/clash/v1/players/by-summoner/{}",
+        summoner_id,
+        error_handler=handle_api_error,
+    )
     if not player_data:
         return None
     
     # Get team details
     team_id = player_data[0]["teamId"]
-    team_url = f"https://{REGION}.api.riotgames.com/lol/clash/v1/teams/{team_id}"
-    team_response = requests.get(team_url, headers=headers)
-    
-    if team_response.status_code != 200:
-        raise Exception(handle_api_error(team_response))
-    
-    return team_response.json()
+    return await riot_api.get(
+        REGION,
+        "/lol/clash/v1/teams/{}",
+        team_id,
+        error_handler=handle_api_error,
+    )
 
-def format_team_data(team_data, tournaments):
-    """Format team data into a readable string."""
+def format_team_data(team_data, tournaments, names=None):
+    """Format team data into a readable string. `names` maps summoner IDs to Riot IDs."""
     if not team_data:
         return "No active Clash team found."
     
     # Find tournament name
     tournament_name = "Unknown Tournament"
-    for tournament in tournaments:
-        if tournament["id"] == team_data["tournamentId"]:
-            tournament_name = tournament["name"]
-            tournament_date = datetime.fromtimestamp(tournament["schedule"][0]["registrationTime"] / 1000).strftime("%B %d, %Y")
+    tournament_date = "Unknown Date"
+    tournament = tournaments.get(team_data["tournamentId"])
+    if tournament:
+        tournament_name = tournament["name"]
+        tournament_date = datetime.fromtimestamp(tournament["schedule"][0]["registrationTime"] / 1000).strftime("%B %d, %Y")
     
     # Get team tier name
     tier_names = {1: "Tier I (Highest)", 2: "Tier II", 3: "Tier III", 4: "Tier IV (Lowest)"}
     tier = tier_names.get(team_data["tier"], f"Tier {team_data['tier']}")
     
+    # clash-v1 only gives the captain's summoner ID, and players without names
+    names = names or {}
+    captain = team_data["captain"]
+    if isinstance(captain, dict):
+        captain = captain.get("summonerId", "Unknown")
+    captain = names.get(captain, captain)
     formatted_data = [
         f"**Tournament:** {tournament_name} ({tournament_date})",
         f"**Team Name:** {team_data['name']}",
         f"**Tier:** {tier}",
-        f"**Captain:** {team_data['captain']['summonerName']}",
+        f"**Captain:** {captain}",
         "\n**Team Members:**"
     ]
     
     for player in team_data["players"]:
         position = player.get("position", "UNASSIGNED").capitalize()
-        formatted_data.append(f"• {player['summonerName']} - {position}")
+        name = names.get(player.get("summonerId"), player.get("summonerId", "Unknown"))
+        formatted_data.append(f"• {name} - {position}")
     
     return "\n".join(formatted_data)
 
+async def get_player_puuid(player):
+    """Return a Clash player's PUUID, looking it up from the summoner ID if the team data lacks it."""
+    if player.get("puuid"):
+        return player["puuid"]
+    summoner = await riot_api.get(
+        REGION,
+        "/lol/summoner/v4/summoners/{}",
+        player["summonerId"],
+        error_handler=handle_api_error,
+    )
+    return summoner["puuid"]
+
+async def get_player_name(puuid_task):
+    """Return a Clash player's Riot ID, clash-v1 no longer includes summoner names."""
+    puuid = await puuid_task
+    return account_resolver.display_name(await account_resolver.get_account_by_puuid(puuid))
+
+async def get_player_names(players):
+    """Map each player's summoner ID to their Riot ID, leaving out players whose lookup failed."""
+    async def resolve(player):
+        try:
+            return player["summonerId"], await get_player_name(get_player_puuid(player))
+        except Exception as e:
+            logger.warning(f"Could not resolve the Riot ID of Clash player {player.get('summonerId')}: {e}")
+            return None
+
+    return dict(filter(None, await asyncio.gather(*(resolve(player) for player in players))))
+
+async def get_recent_summaries(puuid_task):
+    puuid = await puuid_task
+    match_ids = await get_match_history(puuid, SCOUT_RECENT_GAMES)
+    return await get_match_summaries(match_ids, puuid)
+
+async def get_top_champions(puuid_task):
+    puuid = await puuid_task
+    await data_dragon.ensure_loaded()
+    return [
+        data_dragon.champion_name(entry["championId"])
+        for entry in await get_top_champion_mastery(puuid)
+    ]
+
+async def scout_team(team_data, budget=SCOUT_BUDGET):
+    """Fetch rank, top mastery and recent games for every player of a team concurrently.
+
+    Returns one report dict per player and whether the budget ran out. A
+    section that didn't arrive in time is simply missing from its report;
+    the requests keep running in the background so their results are
+    cached for the next scout.
+    """
+    reports = []
+    tasks = []
+
+    async def fill(report, key, coro):
+        try:
+            report[key] = await coro
+        except Exception as e:
+            report[key] = e
+
+    async def fill_name(report, puuid_task):
+        try:
+            report["name"] = await get_player_name(puuid_task)
+        except Exception as e:
+            logger.warning(f"Could not resolve the Riot ID of Clash player {report['name']}: {e}")
+
+    for player in team_data["players"]:
+        report = {
+            "name": player.get("summonerId", "Unknown"),  # Replaced by the Riot ID once it resolves
+            "position": player.get("position", "UNASSIGNED").capitalize(),
+        }
+        reports.append(report)
+        puuid_task = asyncio.ensure_future(get_player_puuid(player))
+        tasks.append(fill_name(report, puuid_task))
+        tasks.append(fill(report, "rank", get_league_entries(player["summonerId"])))
+        tasks.append(fill(report, "mastery", get_top_champions(puuid_task)))
+        tasks.append(fill(report, "recent", get_recent_summaries(puuid_task)))
+
+    _, pending = await asyncio.wait([asyncio.ensure_future(task) for task in tasks], timeout=budget)
+    # Keep a reference so the event loop doesn't garbage-collect them mid-flight
+    for task in pending:
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+    return reports, bool(pending)
+
+def format_scout_rank(entries):
+    """Format a player's solo queue rank (or flex, if they only play flex) on one line."""
+    entries = sorted(entries, key=lambda entry: entry["queueType"] != "RANKED_SOLO_5x5")
+    if not entries:
+        return "Unranked"
+    entry = entries[0]
+    games = entry["wins"] + entry["losses"]
+    win_rate = round(entry["wins"] / games * 100) if games else 0
+    return f"{entry['tier'].capitalize()} {entry['rank']} {entry['leaguePoints']} LP ({win_rate}% WR)"
+
+def format_scout_recent(summaries):
+    wins = sum(1 for summary in summaries if summary.win)
+    champions = ", ".join(dict.fromkeys(summary.champion for summary in summaries))
+    return f"{wins}W-{len(summaries) - wins}L ({champions})" if summaries else "No recent games"
+
+def format_scout_report(reports, timed_out):
+    """Format the per-player scouting reports into readable text."""
+    sections = (
+        ("rank", "Rank", format_scout_rank),
+        ("mastery", "Top Champions", ", ".join),
+        ("recent", f"Last {SCOUT_RECENT_GAMES}", format_scout_recent),
+    )
+    formatted_data = []
+    for report in reports:
+        formatted_data.append(f"**{report['name']}** - {report['position']}")
+        for key, label, formatter in sections:
+            if key not in report:
+                value = "⏳ Timed out"
+            elif isinstance(report[key], Exception):
+                value = "Unavailable"
+            else:
+                value = formatter(report[key])
+            formatted_data.append(f"{label}: {value}")
+        formatted_data.append("")
+
+    if timed_out:
+        formatted_data.append("*Some data took too long to load. Try again in a moment for the full report.*")
+    return "\n".join(formatted_data)
+
 def add_clash_command(bot):
     @bot.slash_command(
         name="clash",
@@ -119,38 +273,61 @@ def add_clash_command(bot):
             logger.info(f"Fetching clash data for: {riot_id}")
             
             # Parse Riot ID
-            if "#" in riot_id:
-                name, tag = riot_id.split("#")
-            else:
-                name, tag = riot_id, "NA1"
+            name, tag = account_resolver.parse_riot_id(riot_id)
             logger.info(f"Parsed Riot ID - Name: {name}, Tag: {tag}")
             
             # Get summoner data
-            summoner = get_summoner_by_riot_id(name, tag)
+            summoner = await get_summoner_by_riot_id(riot_id)
             logger.info(f"Successfully fetched summoner data for {riot_id}")
             
-            # Get tournaments
-            tournaments = get_active_tournaments()
-            logger.info("Successfully fetched tournament data")
-            
             # Get and format team data
-            team_data = get_clash_team_by_summoner(summoner["id"])
+            team_data = await get_clash_team_by_summoner(summoner["id"])
             if team_data:
                 logger.info(f"Found active clash team for {riot_id}")
             else:
                 logger.info(f"No active clash team found for {riot_id}")
-                
-            formatted_data = format_team_data(team_data, tournaments)
-            
-            embed = nextcord.Embed(
-                title=f"Clash Team Info for {riot_id}",
-                description=formatted_data,
-                color=0x1e90ff
-            )
+
+            # Get tournaments, refetched if the team's tournament isn't in the cached list
+            tournaments = await get_active_tournaments(team_data["tournamentId"] if team_data else None)
+            logger.info("Successfully fetched tournament data")
+
+            names = await get_player_names(team_data["players"]) if team_data else {}
+            formatted_data = format_team_data(team_data, tournaments, names)
             
-            await interaction.followup.send(embed=embed)
+            await send_lines(interaction, f"Clash Team Info for {riot_id}", formatted_data.split("\n"))
             
         except Exception as e:
             error_msg = f"Error fetching clash data for {riot_id}: {str(e)}"
             logger.error(error_msg, exc_info=True)
-            await interaction.followup.send(str(e)) 
\ No newline at end of file
+            await send_error(interaction, str(e))
+
+    @bot.slash_command(
+        name="clash_scout",
+        description="Scout a Clash team: rank, top champions and recent games for every player",
+    )
+    async def clash_scout_command(interaction: nextcord.Interaction, riot_id: str):
+        await interaction.response.defer()
+
+        try:
+            logger.info(f"Scouting clash team for: {riot_id}")
+
+            summoner = await get_summoner_by_riot_id(riot_id)
+            team_data = await get_clash_team_by_summoner(summoner["id"])
+            if not team_data:
+                await interaction.followup.send("No active Clash team found.")
+                return
+
+            reports, timed_out = await scout_team(team_data)
+            if timed_out:
+                logger.warning(f"Clash scout for {riot_id} ran out of time, sending partial results")
+
+            await send_lines(
+                interaction,
+                f"Scouting Report: {team_data['name']}",
+                format_scout_report(reports, timed_out).split("\n"),
+            )
+
+        except Exception as e:
+            error_msg = f"Error scouting clash team for {riot_id}: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            await send_error(interaction, str(e))
@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+import json
+import os
+import logging
+import nextcord
+from commands import storage
+
+logger = logging.getLogger("BotLogger")
+
+HASH_FILE = "command_sync.json"
+
+_associated = set()  # Scopes (None for global, else a guild ID) whose command IDs we already know this run
+_locks = {}
+
+
+def scope_commands(bot, guild_id=None):
+    """Return the locally registered commands that belong to one scope (None for global)."""
+    return [
+        command for command in bot.get_all_application_commands()
+        if (command.is_global if guild_id is None else guild_id in command.guild_ids_to_rollout)
+    ]
+
+
+def schema_hash(commands, guild_id=None):
+    """Hash the payloads we would upload for a scope, independent of registration order."""
+    payloads = sorted(
+        (command.get_payload(guild_id) for command in commands),
+        key=lambda payload: (payload["name"], payload.get("type", 1)),
+    )
+    return hashlib.sha256(json.dumps(payloads, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _load_hashes():
+    path = storage.cache_path(HASH_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_hash(key, digest):
+    hashes = _load_hashes()
+    if digest is None:
+        hashes.pop(key, None)
+    else:
+        hashes[key] = digest
+    with open(storage.cache_path(HASH_FILE), "w") as f:
+        json.dump(hashes, f, indent=2)
+
+
+async def sync_commands(bot, guild_id=None, force=False):
+    """Sync one scope's commands with Discord, but only upload them if their schemas changed.
+
+    Unchanged commands are only associated with their Discord IDs (one fetch),
+    and not even that if this run already did it, e.g. after a reconnect.
+    Returns True if the commands were uploaded.
+    """
+    lock = _locks.setdefault(guild_id, asyncio.Lock())
+    async with lock:
+        commands = scope_commands(bot, guild_id)
+        key = f"{bot.application_id}:{'global' if guild_id is None else guild_id}"
+        digest = schema_hash(commands, guild_id) if commands else None
+        stored = (await asyncio.to_thread(_load_hashes)).get(key)
+        if digest is None and stored is None:
+            return False  # Nothing of ours in this scope, now or before
+        changed = force or digest != stored
+        if not changed and guild_id in _associated:
+            return False
+
+        scope = "global" if guild_id is None else f"guild {guild_id}"
+        try:
+            await bot.sync_application_commands(
+                guild_id=guild_id,
+                associate_known=True,
+                delete_unknown=changed,
+                update_known=changed,
+                register_new=changed,
+            )
+        except nextcord.Forbidden as e:
+            logger.warning(f"Not allowed to sync application commands for {scope}: {e}")
+            return False
+
+        _associated.add(guild_id)
+        if changed:
+            await asyncio.to_thread(_save_hash, key, digest)
+            logger.info(f"Synced {len(commands)} application commands for {scope}")
+        else:
+            logger.info(f"Application commands for {scope} unchanged, skipped uploading them")
+        return changed
+
+
+def add_sync_command(bot, GUILD_IDS):
+    @bot.slash_command(
+        name="sync_commands",
+        description="Re-upload the bot's slash commands to Discord",
+        guild_ids=GUILD_IDS,
+        default_member_permissions=nextcord.Permissions(administrator=True),
+    )
+    async def sync_commands_command(interaction: nextcord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        scopes = [None, *sorted({
+            guild_id for command in bot.get_all_application_commands() for guild_id in command.guild_ids_to_rollout
+        })]
+        for guild_id in scopes:
+            await sync_commands(bot, guild_id, force=True)
+        logger.info(f"{interaction.user} forced an application command sync")
+        await interaction.followup.send(f"Synced commands for {len(scopes)} scopes.", ephemeral=True)
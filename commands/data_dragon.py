@@ -0,0 +1,129 @@
+import asyncio
+import glob
+import json
+import os
+import logging
+from commands import riot_api
+from commands import storage
+
+logger = logging.getLogger("BotLogger")
+
+# How often we check versions.json for a new patch
+REFRESH_INTERVAL = 6 * 60 * 60
+DDRAGON_URL = "https://ddragon.leagueoflegends.com"
+
+_version = None
+_champions = {}  # Champion key ("266") -> {"id": "Aatrox", "name": "Aatrox"}
+_load_lock = None
+_prewarm_task = None
+_refresh_task = None
+
+
+def _cache_file(version):
+    return storage.cache_path(os.path.join("ddragon", f"champions-{version}.json"))
+
+
+def _read_cache(version=None):
+    """Read the saved champion map for a version, or the newest one on disk if no version is given."""
+    if version is not None:
+        paths = [_cache_file(version)]
+    else:
+        os.makedirs(storage.cache_path("ddragon"), exist_ok=True)
+        paths = sorted(glob.glob(_cache_file("*")), key=os.path.getmtime, reverse=True)
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+    return None
+
+
+def _write_cache(data):
+    path = _cache_file(data["version"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+async def _latest_version():
+    versions = await riot_api.get(riot_api.DDRAGON_HOST, "/api/versions.json")
+    return versions[0]
+
+
+async def _load_version(version):
+    """Load the champion map for a patch, from disk if we saved it before, otherwise from Data Dragon."""
+    global _version, _champions
+    data = await asyncio.to_thread(_read_cache, version)
+    if data is None:
+        champion_json = await riot_api.get(
+            riot_api.DDRAGON_HOST, "/cdn/{}/data/en_US/champion.json", version
+        )
+        data = {
+            "version": version,
+            "champions": {
+                champion["key"]: {"id": champion["id"], "name": champion["name"]}
+                for champion in champion_json["data"].values()
+            },
+        }
+        await asyncio.to_thread(_write_cache, data)
+        logger.info(f"Downloaded Data Dragon champion data for patch {version}")
+    _version, _champions = data["version"], data["champions"]
+
+
+async def ensure_loaded():
+    """Make sure the champion map is in memory. Only the first call does any work."""
+    global _load_lock, _version, _champions
+    if _champions:
+        return
+    if _load_lock is None:
+        _load_lock = asyncio.Lock()
+    async with _load_lock:
+        if _champions:
+            return
+        try:
+            await _load_version(await _latest_version())
+        except Exception as e:
+            # Data Dragon unreachable, fall back to whatever patch we saved last
+            logger.error(f"Error fetching champion data: {e}")
+            data = await asyncio.to_thread(_read_cache)
+            if data:
+                _version, _champions = data["version"], data["champions"]
+
+
+async def _refresh_loop():
+    while True:
+        await asyncio.sleep(REFRESH_INTERVAL)
+        try:
+            version = await _latest_version()
+            if version != _version:
+                await _load_version(version)
+        except Exception as e:
+            logger.error(f"Error refreshing Data Dragon data: {e}")
+
+
+def _log_prewarm_error(task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Error prewarming Data Dragon data: {task.exception()}")
+
+
+def start():
+    """Prewarm the champion map and keep it up to date in the background. Safe to call more than once."""
+    global _prewarm_task, _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        # Keep a reference, the loop only holds tasks weakly and could collect it mid-load
+        _prewarm_task = asyncio.create_task(ensure_loaded())
+        _prewarm_task.add_done_callback(_log_prewarm_error)
+        _refresh_task = asyncio.create_task(_refresh_loop())
+
+
+def champion_name(champion_id):
+    """Return the display name for a champion ID (e.g. 266 -> 'Aatrox')."""
+    champion = _champions.get(str(champion_id))
+    return champion["name"] if champion else f"Champion {champion_id}"
+
+
+def champion_icon_url(champion_id):
+    """Return the square icon URL for a champion ID, or None if we don't know the champion."""
+    champion = _champions.get(str(champion_id))
+    if not champion:
+        return None
+    return f"{DDRAGON_URL}/cdn/{_version}/img/champion/{champion['id']}.png"
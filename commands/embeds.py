@@ -0,0 +1,107 @@
+import nextcord
+from commands import metrics
+
+# Discord's limits for embeds sent in one message
+TITLE_LIMIT = 256
+DESCRIPTION_LIMIT = 4096
+MESSAGE_TOTAL_LIMIT = 6000  # Titles + descriptions + fields + footers of every embed in the message
+EMBEDS_PER_MESSAGE = 10
+
+DEFAULT_COLOR = 0x1e90ff
+
+
+def fit(text, limit):
+    """Cut text down to `limit` characters, marking the cut."""
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def pack_lines(lines, limit=DESCRIPTION_LIMIT, title_size=0):
+    """Pack whole lines into description chunks that fill Discord messages as fully as possible.
+
+    Each chunk holds at most `limit` characters, and consecutive chunks are
+    sized so that the embeds of one message stay under MESSAGE_TOTAL_LIMIT
+    together (each embed's title counting `title_size` towards it).
+    """
+    chunks = []
+    current = []
+    size = 0
+    message_used = 0
+    message_embeds = 0
+
+    def room():
+        return min(limit, MESSAGE_TOTAL_LIMIT - message_used - title_size)
+
+    for line in lines:
+        line = fit(line, limit)
+        added = len(line) + (1 if current else 0)  # +1 for the joining newline
+        if current and size + added > room():
+            chunks.append("\n".join(current))
+            message_used += size + title_size
+            message_embeds += 1
+            current, size = [], 0
+            added = len(line)
+            if message_embeds == EMBEDS_PER_MESSAGE or room() < added:
+                message_used, message_embeds = 0, 0  # Start filling the next message
+        current.append(line)
+        size += added
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def build_embeds(title, lines, color=DEFAULT_COLOR, limit=DESCRIPTION_LIMIT):
+    """Turn lines of text into embeds, splitting by character budget and numbering pages if there are several."""
+    # Leave room in every title for the " (Page i/n)" suffix
+    chunks = pack_lines(lines, limit, title_size=len(title) + 16) or ["Nothing to show."]
+    if len(chunks) == 1:
+        return [nextcord.Embed(title=fit(title, TITLE_LIMIT), description=chunks[0], color=color)]
+    return [
+        nextcord.Embed(
+            title=fit(f"{title} (Page {i + 1}/{len(chunks)})", TITLE_LIMIT),
+            description=chunk,
+            color=color,
+        )
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def embed_size(embed):
+    """Count the characters of an embed the way Discord does for its per-message limit."""
+    size = len(embed.title or "") + len(embed.description or "")
+    size += sum(len(field.name) + len(field.value) for field in embed.fields)
+    size += len(embed.footer.text or "") + len(embed.author.name or "")
+    return size
+
+
+def group_embeds(embeds):
+    """Group embeds into as few messages as Discord's per-message limits allow."""
+    groups = []
+    current = []
+    size = 0
+    for embed in embeds:
+        added = embed_size(embed)
+        if current and (len(current) == EMBEDS_PER_MESSAGE or size + added > MESSAGE_TOTAL_LIMIT):
+            groups.append(current)
+            current, size = [], 0
+        current.append(embed)
+        size += added
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def send_embeds(interaction, embeds, **kwargs):
+    """Send embeds as interaction followups, using as few messages as possible."""
+    for group in group_embeds(embeds):
+        await interaction.followup.send(embeds=group, **kwargs)
+
+
+async def send_lines(interaction, title, lines, color=DEFAULT_COLOR, **kwargs):
+    """Render lines of text into embeds and send them in as few followups as possible."""
+    await send_embeds(interaction, build_embeds(title, lines, color), **kwargs)
+
+
+async def send_error(interaction, message, **kwargs):
+    """Reply with an error message and count the command as failed in the metrics."""
+    metrics.record_error()
+    await interaction.followup.send(message, **kwargs)
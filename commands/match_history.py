@@ -1,16 +1,21 @@
-import requests
 import nextcord
-from nextcord.ext import commands
-from dotenv import load_dotenv
-import os
 import datetime
+import asyncio
+from commands import riot_api
+from commands import match_store
+from commands import match_index
+from commands import embeds
+from commands.account_resolver import get_account, parse_riot_id
+from config import config
 
-# Load .env file
-load_dotenv()
-
-RIOT_API_KEY = os.getenv("RIOT_API_KEY")  # Load from .env
 REGION = "na1"  # Default region
 ACCOUNT_REGION = "americas"  # Use the broader account region for the Account API
+# How many match details are fetched at once (the rate limiter still applies on top)
+MATCH_FETCH_CONCURRENCY = config.match_fetch_concurrency
+MAX_MATCH_COUNT = 200  # The local match index pages past match-v5's 100 IDs per request
+PAGE_SIZE = 20  # Match history lines per embed
+STREAM_UPDATE_INTERVAL = 1.0  # Seconds between edits while a page is still filling
+VIEW_TIMEOUT = 300  # Seconds of inactivity before the page buttons stop working and loaded pages are dropped
 
 # Mapping queue IDs to human-readable names
 QUEUE_ID_MAPPING = {
@@ -25,125 +30,203 @@ QUEUE_ID_MAPPING = {
     1020: "One for All",
 }
 
-def handle_api_error(response):
-    """Handle common API errors and return a user-friendly message."""
-    if response.status_code == 429:
-        return "Slow down! Riot's servers are rate-limited."
-    elif response.status_code == 403:
-        return "Invalid API key."
-    elif response.status_code == 404:
-        return "Summoner not found. Check the Riot ID format."
-    return f"An error occurred: {response.status_code} {response.reason}"
-
-def parse_riot_id(riot_id):
-    """Parses a Riot ID in the format 'SummonerName#TAG' and returns name and tag."""
-    if "#" in riot_id:
-        name, tag = riot_id.split("#", 1)
-    else:
-        name, tag = riot_id, "na1"  # Default to NA1 if no tag is provided
-    return name, tag
-
-def get_account_data(summoner_name, tag_line):
-    """Fetch account data by Riot ID."""
-    url = f"https://{ACCOUNT_REGION}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{summoner_name}/{tag_line}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(handle_api_error(response))
-    return response.json()
-
-def get_match_history(puuid, count):
-    """Fetch match history for a given PUUID with a configurable count."""
-    if not (1 <= count <= 100):
-        raise ValueError("Count must be between 1 and 100.")
-    url = f"https://{ACCOUNT_REGION}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?count={count}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(handle_api_error(response))
-    return response.json()
-
-def get_match_details(match_id):
-    """Fetch match details by match ID."""
-    url = f"https://{ACCOUNT_REGION}.api.riotgames.com/lol/match/v5/matches/{match_id}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(handle_api_error(response))
-    return response.json()
-
-async def fetch_and_format_history(riot_id, match_count):
-    """Fetch and format match history for a Riot ID, including total win-loss count and links."""
-    summoner_name, tag_line = parse_riot_id(riot_id)
-
-    # Step 1: Get account data
-    account_data = get_account_data(summoner_name, tag_line)
-    puuid = account_data["puuid"]
-
-    # Construct summoner profile link
-    encoded_summoner_name = summoner_name.replace(" ", "%20")
-    summoner_profile_url = f"https://www.leagueofgraphs.com/summoner/na/{encoded_summoner_name}-{(tag_line or 'na1').upper()}"
-
-    # Step 2: Get match IDs with the specified count
-    match_ids = get_match_history(puuid, match_count)
-
-    # Step 3: Fetch match details and format the results
-    matches = [get_match_details(match_id) for match_id in match_ids]
-    
-    # Filter out early surrender games by checking both game and participant flags
-    filtered_matches = []
-    for match in matches:
-        participant = next(p for p in match["info"]["participants"] if p["puuid"] == puuid)
-        if not participant["teamEarlySurrendered"]:
-            filtered_matches.append(match)
-    matches = filtered_matches
-    
-    results = []
-    wins, losses = 0, 0  # Track wins and losses
-
-    for match in matches:
-        participant = next(
-            p for p in match["info"]["participants"] if p["puuid"] == puuid
-        )
-        win = "✅" if participant["win"] else "❌"
-        champion = participant["championName"]
-        kda = f"{participant['kills']}/{participant['deaths']}/{participant['assists']}"
-
-        # Game creation timestamp
-        game_creation = datetime.datetime.fromtimestamp(
-            match["info"]["gameCreation"] / 1000
-        ).strftime("%d-%m-%y %H:%M")
-
-        # Queue type
-        queue_id = match["info"]["queueId"]
-        queue_type = QUEUE_ID_MAPPING.get(queue_id, "Unknown Mode")
-
-        # Construct match details link
-        match_id = match["metadata"]["matchId"]
-        match_url = f"https://www.leagueofgraphs.com/match/na/{match_id.split('_')[1]}"
-
-        # Update win/loss counters
-        if participant["win"]:
-            wins += 1
-        else:
-            losses += 1
-
-        # Combine all details with links
-        results.append(
-            f"{win} | {champion} {kda} | {queue_type} | {game_creation} | [Match Details]({match_url})"
+async def get_match_history(puuid, count):
+    """Fetch match history for a given PUUID, served from the incrementally synced match index."""
+    if not (1 <= count <= MAX_MATCH_COUNT):
+        raise ValueError(f"Count must be between 1 and {MAX_MATCH_COUNT}.")
+    return await match_index.get_match_ids(puuid, count)
+
+async def get_match_summary(match_id, puuid):
+    """Fetch a player's summary of a match, reading the local match store first.
+
+    Returns None if the player isn't among the match's participants.
+    """
+    summary = await match_store.get(match_id, puuid)
+    if summary is not None:
+        return summary
+    match = await riot_api.get(
+        ACCOUNT_REGION,
+        "/lol/match/v5/matches/{}",
+        match_id,
+    )
+    # Only the summaries are kept, for every player in the match, the full payload is dropped here
+    summaries = match_store.summarize(match)
+    await match_store.put(summaries)
+    # A bare next() would raise StopIteration, which a coroutine turns into a RuntimeError
+    return next((s for s in summaries if s.puuid == puuid), None)
+
+async def stream_match_summaries(match_ids, puuid, concurrency=MATCH_FETCH_CONCURRENCY):
+    """Fetch match summaries concurrently and yield them in match_ids order as soon as each is ready.
+
+    Matches the player isn't part of are skipped.
+    """
+    stored = await match_store.get_many(match_ids, puuid)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(match_id):
+        if match_id in stored:
+            return stored[match_id]
+        async with semaphore:
+            return await get_match_summary(match_id, puuid)
+
+    tasks = [asyncio.ensure_future(fetch(match_id)) for match_id in match_ids]
+    try:
+        for task in tasks:
+            summary = await task
+            if summary is not None:
+                yield summary
+    finally:
+        # The consumer stopped early (or failed), don't leave fetches running for nobody
+        for task in tasks:
+            task.cancel()
+
+async def get_match_summaries(match_ids, puuid, concurrency=MATCH_FETCH_CONCURRENCY):
+    """Fetch several match summaries concurrently, returned in the same order as match_ids."""
+    return [summary async for summary in stream_match_summaries(match_ids, puuid, concurrency)]
+
+def format_match_row(match):
+    """Format one match summary as a single history line."""
+    win = "✅" if match.win else "❌"
+    champion = match.champion
+    kda = f"{match.kills}/{match.deaths}/{match.assists}"
+
+    # Game creation timestamp
+    game_creation = datetime.datetime.fromtimestamp(
+        match.game_creation / 1000
+    ).strftime("%d-%m-%y %H:%M")
+
+    # Queue type
+    queue_type = QUEUE_ID_MAPPING.get(match.queue_id, "Unknown Mode")
+
+    # Construct match details link
+    match_url = f"https://www.leagueofgraphs.com/match/na/{match.match_id.split('_')[1]}"
+
+    # Combine all details with links
+    return f"{win} | {champion} {kda} | {queue_type} | {game_creation} | [Match Details]({match_url})"
+
+class MatchHistoryView(nextcord.ui.View):
+    """Paginated match history that only fetches the matches of pages someone actually looks at.
+
+    The page being shown streams its rows in as they arrive, and the next
+    page is prefetched in the background. Loaded pages live in the view
+    until it times out.
+    """
+
+    def __init__(self, riot_id, puuid, match_ids, profile_url):
+        super().__init__(timeout=VIEW_TIMEOUT)
+        self.riot_id = riot_id
+        self.puuid = puuid
+        self.match_ids = match_ids
+        self.profile_url = profile_url
+        self.page = 0
+        self.page_count = max(1, -(-len(match_ids) // PAGE_SIZE))
+        self.summaries = {}  # Page -> summaries loaded so far, in order
+        self.tasks = {}  # Page -> loading task
+        self.message = None
+        # The latest button press. Its token is fresher than the original /match_history followup's,
+        # which expires after 15 minutes while the view can stay alive for longer
+        self.interaction = None
+        self.update_buttons()
+
+    def load(self, page):
+        """Start loading a page if it isn't already, and return its task."""
+        if page not in self.tasks:
+            self.tasks[page] = asyncio.ensure_future(self._load_page(page))
+        return self.tasks[page]
+
+    async def _load_page(self, page):
+        rows = self.summaries.setdefault(page, [])
+        page_ids = self.match_ids[page * PAGE_SIZE : (page + 1) * PAGE_SIZE]
+        async for summary in stream_match_summaries(page_ids, self.puuid):
+            rows.append(summary)
+
+    def build_embed(self, page):
+        summaries = [s for s in self.summaries.get(page, []) if not s.early_surrender]
+        lines = [format_match_row(summary) for summary in summaries]
+        if not self.tasks[page].done():
+            lines.append("⏳ Loading matches...")
+        elif not lines:
+            lines.append("No matches on this page.")
+        lines.append(f"\n[View Summoner Profile]({self.profile_url})")
+
+        # The win-loss count only covers pages that were loaded, the rest were never fetched
+        loaded = [
+            s for p, task in self.tasks.items() if task.done() and not task.cancelled()
+            for s in self.summaries.get(p, []) if not s.early_surrender
+        ]
+        wins = sum(1 for summary in loaded if summary.win)
+        embed = nextcord.Embed(
+            title=f"Match History for {self.riot_id} (Page {page + 1}/{self.page_count})",
+            description=embeds.fit("\n".join(lines), embeds.DESCRIPTION_LIMIT),
+            color=0x1e90ff
         )
+        embed.set_footer(text=f"Loaded games: {len(loaded)} | Wins: {wins} | Losses: {len(loaded) - wins}")
+        return embed
+
+    def update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.page_count - 1
+
+    async def edit(self, **kwargs):
+        """Edit the message through the freshest interaction. Returns False if Discord refused."""
+        try:
+            if self.interaction is not None:
+                await self.interaction.edit_original_message(**kwargs)
+            else:
+                await self.message.edit(**kwargs)
+        except nextcord.HTTPException:
+            return False
+        return True
+
+    async def show(self, page):
+        """Keep the message updated while `page` loads, then prefetch the page after it."""
+        task = self.load(page)
+        while not task.done():
+            await asyncio.wait({task}, timeout=STREAM_UPDATE_INTERVAL)
+            if self.page != page:
+                return  # Someone moved on, the other page's show() owns the message now
+            if not task.done() and not await self.edit(embed=self.build_embed(page), view=self):
+                return
+        try:
+            task.result()
+        except Exception as e:
+            # Drop the failed page so the next visit retries it
+            self.tasks.pop(page, None)
+            self.summaries.pop(page, None)
+            if self.page == page:
+                await self.edit(content=str(e), embed=None, view=self)
+            return
+        if self.page != page:
+            return
+        # Always show the finished page, it may have loaded before the loop above ran at all
+        await self.edit(embed=self.build_embed(page), view=self)
+        if page + 1 < self.page_count:
+            self.load(page + 1)
 
-    # Add total win-loss count and summoner profile link
-    results.append(f"\n**Total Games:** {wins + losses}")
-    results.append(f"**Wins:** {wins} ✅ | **Losses:** {losses} ❌")
-    results.append(f"\n[View Summoner Profile]({summoner_profile_url})")
+    async def go_to(self, page, interaction):
+        self.page = page
+        self.interaction = interaction
+        self.update_buttons()
+        self.load(page)
+        await interaction.response.edit_message(content=None, embed=self.build_embed(page), view=self)
+        await self.show(page)
 
-    return results
+    @nextcord.ui.button(label="◀ Previous", style=nextcord.ButtonStyle.secondary)
+    async def previous_page(self, button, interaction):
+        await self.go_to(self.page - 1, interaction)
 
-def split_by_chunk_size(content, chunk_size):
-    """Split a list into chunks of a specified size."""
-    for i in range(0, len(content), chunk_size):
-        yield content[i : i + chunk_size]
+    @nextcord.ui.button(label="Next ▶", style=nextcord.ButtonStyle.secondary)
+    async def next_page(self, button, interaction):
+        await self.go_to(self.page + 1, interaction)
+
+    async def on_timeout(self):
+        for task in self.tasks.values():
+            task.cancel()
+        self.summaries.clear()
+        self.previous_page.disabled = True
+        self.next_page.disabled = True
+        if self.message:
+            await self.edit(view=self)
 
 def add_match_history_command(bot):
     @bot.slash_command(
@@ -155,26 +238,28 @@ def add_match_history_command(bot):
         riot_id: str,  # Riot ID input (e.g., "SummonerName#TAG")
         match_count: int = 10  # Default to 10 matches
     ):
-        # Limit match count to 1-50 for usability
-        if match_count > 50:
-            match_count = 50
+        # Limit match count to 1-MAX_MATCH_COUNT for usability
+        if match_count > MAX_MATCH_COUNT:
+            match_count = MAX_MATCH_COUNT
         elif match_count < 1:
             match_count = 1
 
         await interaction.response.defer()  # Defer the response to prevent timeouts
 
         try:
-            # Fetch and format the history with the specified match count
-            history = await fetch_and_format_history(riot_id, match_count)
-
-            # Split the results into chunks of 20 entries
-            chunks = list(split_by_chunk_size(history, 20))
-            for i, chunk in enumerate(chunks):
-                embed = nextcord.Embed(
-                    title=f"Match History for {riot_id} (Page {i + 1}/{len(chunks)})",
-                    description="\n".join(chunk),
-                    color=0x1e90ff
-                )
-                await interaction.followup.send(embed=embed)
+            summoner_name, tag_line = parse_riot_id(riot_id)
+            account_data = await get_account(riot_id)
+            puuid = account_data["puuid"]
+
+            # Match IDs are cheap (local index), match details are only fetched per page viewed
+            match_ids = await get_match_history(puuid, match_count)
+
+            encoded_summoner_name = summoner_name.replace(" ", "%20")
+            summoner_profile_url = f"https://www.leagueofgraphs.com/summoner/na/{encoded_summoner_name}-{tag_line.upper()}"
+
+            view = MatchHistoryView(riot_id, puuid, match_ids, summoner_profile_url)
+            view.load(0)
+            view.message = await interaction.followup.send(embed=view.build_embed(0), view=view, wait=True)
+            await view.show(0)
         except Exception as e:
-            await interaction.followup.send(str(e))
\ No newline at end of file
+            await embeds.send_error(interaction, str(e))
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+import logging
+from commands import riot_api
+from commands import storage
+
+logger = logging.getLogger("BotLogger")
+
+ACCOUNT_REGION = "americas"  # match-v5 is served from the regional host
+IDS_PAGE_SIZE = 100  # Most IDs match-v5 returns per request
+# Games that were still running at the last sync started before it, so look back a bit further
+SYNC_OVERLAP = 60 * 60
+
+_conn = None
+_lock = threading.Lock()
+_sync_locks = {}
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = storage.connect("matches.sqlite3")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS match_index ("
+            " puuid TEXT NOT NULL,"
+            " match_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " PRIMARY KEY (puuid, match_id))"
+        )
+        _conn.execute("CREATE INDEX IF NOT EXISTS match_index_seq ON match_index (puuid, seq DESC)")
+        # synced_at: when we last fetched new IDs, complete: we reached the player's oldest match
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS match_sync ("
+            " puuid TEXT PRIMARY KEY,"
+            " synced_at INTEGER NOT NULL,"
+            " complete INTEGER NOT NULL DEFAULT 0)"
+        )
+        _conn.commit()
+    return _conn
+
+
+def _match_seq(match_id):
+    """Match IDs ('NA1_5012345678') grow over time, so the number orders them newest first."""
+    return int(match_id.rsplit("_", 1)[-1])
+
+
+def _load_state(puuid):
+    with _lock:
+        conn = _get_conn()
+        state = conn.execute(
+            "SELECT synced_at, complete FROM match_sync WHERE puuid = ?", (puuid,)
+        ).fetchone()
+        held = conn.execute("SELECT COUNT(*) FROM match_index WHERE puuid = ?", (puuid,)).fetchone()[0]
+    return state, held
+
+
+def _save(puuid, match_ids, synced_at, complete):
+    with _lock:
+        conn = _get_conn()
+        conn.executemany(
+            "INSERT OR IGNORE INTO match_index (puuid, match_id, seq) VALUES (?, ?, ?)",
+            [(puuid, match_id, _match_seq(match_id)) for match_id in match_ids],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO match_sync (puuid, synced_at, complete) VALUES (?, ?, ?)",
+            (puuid, synced_at, int(complete)),
+        )
+        conn.commit()
+        return conn.execute("SELECT COUNT(*) FROM match_index WHERE puuid = ?", (puuid,)).fetchone()[0]
+
+
+def _load_ids(puuid, count, offset):
+    with _lock:
+        rows = _get_conn().execute(
+            "SELECT match_id FROM match_index WHERE puuid = ? ORDER BY seq DESC LIMIT ? OFFSET ?",
+            (puuid, count, offset),
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+async def _fetch_ids(puuid, start=0, limit=None, start_time=None):
+    """Page through match-v5 IDs (newest first) until `limit` IDs or the end of the list."""
+    match_ids = []
+    while limit is None or len(match_ids) < limit:
+        page_size = IDS_PAGE_SIZE if limit is None else min(IDS_PAGE_SIZE, limit - len(match_ids))
+        params = {"start": start + len(match_ids), "count": page_size}
+        if start_time is not None:
+            params["startTime"] = start_time
+        page = await riot_api.get(
+            ACCOUNT_REGION, "/lol/match/v5/matches/by-puuid/{}/ids", puuid, params=params
+        )
+        match_ids.extend(page)
+        if len(page) < page_size:
+            break
+    return match_ids
+
+
+async def sync(puuid, count):
+    """Bring the local index for a player up to date and make sure it holds at least `count` IDs.
+
+    The first sync fetches the newest `count` IDs. Later syncs only ask for
+    games started since the previous sync, plus older pages when a bigger
+    `count` than before is requested.
+    """
+    lock = _sync_locks.setdefault(puuid, asyncio.Lock())
+    async with lock:
+        state, held = await asyncio.to_thread(_load_state, puuid)
+        now = int(time.time())
+        complete = bool(state and state[1])
+
+        if state is not None:
+            new_ids = await _fetch_ids(puuid, start_time=state[0] - SYNC_OVERLAP)
+            held = await asyncio.to_thread(_save, puuid, new_ids, now, complete)
+
+        # The index is contiguous from the newest match down, so the next older page starts at `held`
+        if held < count and not complete:
+            wanted = count - held
+            older_ids = await _fetch_ids(puuid, start=held, limit=wanted)
+            complete = len(older_ids) < wanted
+            await asyncio.to_thread(_save, puuid, older_ids, now, complete)
+
+
+async def get_match_ids(puuid, count, offset=0):
+    """Return up to `count` match IDs for a player, newest first, skipping the newest `offset`."""
+    await sync(puuid, offset + count)
+    return await asyncio.to_thread(_load_ids, puuid, count, offset)
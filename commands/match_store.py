@@ -0,0 +1,201 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import OrderedDict
+import logging
+from commands import storage
+from commands import metrics
+from config import config
+
+logger = logging.getLogger("BotLogger")
+
+# Cap for stored matches on disk, least recently used are evicted first
+MAX_STORED_MATCHES = config.match_cache_max_matches
+# Cap for summaries kept in memory (one per player per match)
+MAX_MEMORY_SUMMARIES = config.match_cache_memory_summaries
+
+_conn = None
+_lock = threading.Lock()
+_stored_count = None  # Distinct matches on disk, counted once and then kept up to date by _save
+_memory = OrderedDict()  # (match_id, puuid) -> MatchSummary, oldest first
+
+
+class MatchSummary:
+    """The handful of fields we use from one player's side of a match-v5 payload."""
+
+    __slots__ = (
+        "match_id", "puuid", "win", "champion", "kills", "deaths", "assists",
+        "cs", "queue_id", "game_creation", "game_duration", "early_surrender",
+    )
+    COLUMNS = __slots__
+
+    def __init__(self, match_id, puuid, win, champion, kills, deaths, assists,
+                 cs, queue_id, game_creation, game_duration, early_surrender):
+        self.match_id = match_id
+        self.puuid = puuid
+        self.win = bool(win)
+        self.champion = sys.intern(champion)  # ~170 distinct names shared by every summary
+        self.kills = kills
+        self.deaths = deaths
+        self.assists = assists
+        self.cs = cs
+        self.queue_id = queue_id
+        self.game_creation = game_creation  # Epoch milliseconds
+        self.game_duration = game_duration  # Seconds
+        self.early_surrender = bool(early_surrender)
+
+    def as_row(self):
+        return tuple(getattr(self, column) for column in self.COLUMNS)
+
+
+def summarize(match):
+    """Build a summary for every participant of a match-v5 payload."""
+    info = match["info"]
+    match_id = match["metadata"]["matchId"]
+    return [
+        MatchSummary(
+            match_id,
+            participant["puuid"],
+            participant["win"],
+            participant["championName"],
+            participant["kills"],
+            participant["deaths"],
+            participant["assists"],
+            participant.get("totalMinionsKilled", 0) + participant.get("neutralMinionsKilled", 0),
+            info["queueId"],
+            info["gameCreation"],
+            info.get("gameDuration", 0),
+            participant.get("teamEarlySurrendered", False),
+        )
+        for participant in info["participants"]
+    ]
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = storage.connect("matches.sqlite3")
+        # Full payloads from before summaries were introduced
+        _conn.execute("DROP TABLE IF EXISTS matches")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS match_summaries ("
+            " match_id TEXT NOT NULL,"
+            " puuid TEXT NOT NULL,"
+            " win INTEGER NOT NULL,"
+            " champion TEXT NOT NULL,"
+            " kills INTEGER NOT NULL,"
+            " deaths INTEGER NOT NULL,"
+            " assists INTEGER NOT NULL,"
+            " cs INTEGER NOT NULL,"
+            " queue_id INTEGER NOT NULL,"
+            " game_creation INTEGER NOT NULL,"
+            " game_duration INTEGER NOT NULL,"
+            " early_surrender INTEGER NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " PRIMARY KEY (match_id, puuid))"
+        )
+        _conn.execute(
+            "CREATE INDEX IF NOT EXISTS match_summaries_last_access ON match_summaries (last_access)"
+        )
+        _conn.commit()
+    return _conn
+
+
+def _remember(summary):
+    key = (summary.match_id, summary.puuid)
+    _memory[key] = summary
+    _memory.move_to_end(key)
+    while len(_memory) > MAX_MEMORY_SUMMARIES:
+        _memory.popitem(last=False)
+
+
+def _load(match_ids, puuid):
+    placeholders = ",".join("?" * len(match_ids))
+    columns = ", ".join(MatchSummary.COLUMNS)
+    with _lock:
+        conn = _get_conn()
+        rows = conn.execute(
+            f"SELECT {columns} FROM match_summaries WHERE puuid = ? AND match_id IN ({placeholders})",
+            (puuid, *match_ids),
+        ).fetchall()
+        if rows:
+            conn.execute(
+                f"UPDATE match_summaries SET last_access = ? WHERE match_id IN ({placeholders})",
+                (time.time(), *match_ids),
+            )
+            conn.commit()
+    return [MatchSummary(*row) for row in rows]
+
+
+def _save(summaries):
+    global _stored_count
+    now = time.time()
+    placeholders = ",".join("?" * (len(MatchSummary.COLUMNS) + 1))
+    with _lock:
+        conn = _get_conn()
+        if _stored_count is None:
+            _stored_count = conn.execute("SELECT COUNT(DISTINCT match_id) FROM match_summaries").fetchone()[0]
+        # Primary key lookups, so saving stays cheap however big the store gets
+        _stored_count += sum(
+            1 for match_id in {summary.match_id for summary in summaries}
+            if conn.execute("SELECT 1 FROM match_summaries WHERE match_id = ? LIMIT 1", (match_id,)).fetchone() is None
+        )
+        conn.executemany(
+            f"INSERT OR REPLACE INTO match_summaries VALUES ({placeholders})",
+            [(*summary.as_row(), now) for summary in summaries],
+        )
+        _evict(conn)
+        conn.commit()
+
+
+def _evict(conn):
+    """Drop the least recently used matches until the store is back under its cap."""
+    global _stored_count
+    if _stored_count <= MAX_STORED_MATCHES:
+        return
+    # Leave some headroom so we don't evict on every insert
+    excess = _stored_count - int(MAX_STORED_MATCHES * 0.9)
+    conn.execute(
+        "DELETE FROM match_summaries WHERE match_id IN ("
+        " SELECT match_id FROM match_summaries GROUP BY match_id"
+        " ORDER BY MAX(last_access) LIMIT ?)",
+        (excess,),
+    )
+    # Evicting is rare, so recount here rather than trusting the running total forever
+    _stored_count = conn.execute("SELECT COUNT(DISTINCT match_id) FROM match_summaries").fetchone()[0]
+    logger.info(f"Match cache over its cap, evicted {excess} matches")
+
+
+async def get_many(match_ids, puuid):
+    """Return {match_id: MatchSummary} for the given matches we hold for a player."""
+    found = {}
+    missing = []
+    for match_id in match_ids:
+        summary = _memory.get((match_id, puuid))
+        if summary is not None:
+            _memory.move_to_end((match_id, puuid))
+            found[match_id] = summary
+        else:
+            missing.append(match_id)
+
+    # SQLite limits the number of bound parameters, so look the rest up in batches
+    for i in range(0, len(missing), 500):
+        for summary in await asyncio.to_thread(_load, missing[i : i + 500], puuid):
+            _remember(summary)
+            found[summary.match_id] = summary
+    metrics.record_cache("match_summaries", True, len(found))
+    metrics.record_cache("match_summaries", False, len(match_ids) - len(found))
+    return found
+
+
+async def get(match_id, puuid):
+    """Return a player's summary of a match, or None if we don't have the match."""
+    return (await get_many([match_id], puuid)).get(match_id)
+
+
+async def put(summaries):
+    """Store the summaries of a finished match. Match details never change, so entries never go stale."""
+    for summary in summaries:
+        _remember(summary)
+    await asyncio.to_thread(_save, summaries)
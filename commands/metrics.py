@@ -0,0 +1,273 @@
+import asyncio
+import contextlib
+import contextvars
+import os
+import time
+import logging
+import nextcord
+from config import config
+
+logger = logging.getLogger("BotLogger")
+
+# Prometheus export, both optional: a text file rewritten every METRICS_FILE_INTERVAL seconds
+# and/or an HTTP endpoint at http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_FILE = config.metrics_file
+METRICS_FILE_INTERVAL = 15
+METRICS_HOST = config.metrics_host
+METRICS_PORT = config.metrics_port
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CALL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HISTOGRAMS = {
+    "bot_command_seconds": ("Time spent handling a slash command", LATENCY_BUCKETS),
+    "bot_command_ack_seconds": ("Time until a slash command deferred or sent its first response", LATENCY_BUCKETS),
+    "bot_command_riot_calls": ("Riot API requests made while handling one slash command", CALL_COUNT_BUCKETS),
+    "riot_request_seconds": ("Riot API response time per endpoint", LATENCY_BUCKETS),
+    "bot_loop_lag_seconds": ("How late the event loop ran a scheduled heartbeat", LAG_BUCKETS),
+}
+COUNTERS = {
+    "bot_commands_total": "Slash commands handled",
+    "bot_command_errors_total": "Slash commands that raised an error",
+    "riot_requests_total": "Riot API requests by endpoint and status",
+    "bot_cache_requests_total": "Cache lookups by cache and result",
+    "bot_loop_stalls_total": "Event loop stalls past the watchdog threshold, by the command that caused them",
+}
+
+_counters = {name: {} for name in COUNTERS}  # name -> {labels: value}
+_histograms = {name: {} for name in HISTOGRAMS}  # name -> {labels: Histogram}
+_current = contextvars.ContextVar("current_invocation", default=None)
+_started = False
+_tasks = []
+
+
+class Histogram:
+    """Bucketed observations, the same shape Prometheus expects."""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is the +Inf bucket
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, n in zip(self.buckets, self.counts):
+            if n and seen + n >= rank:
+                return lower + (bound - lower) * (rank - seen) / n
+            seen += n
+            lower = bound
+        return self.buckets[-1]  # Past the largest bucket, we only know it's at least this
+
+
+class Invocation:
+    """What one slash command has done so far, visible to everything it awaits."""
+
+    __slots__ = ("command", "started", "acknowledged", "riot_calls", "failed")
+
+    def __init__(self, command):
+        self.command = command
+        self.started = time.perf_counter()
+        self.acknowledged = False
+        self.riot_calls = 0
+        self.failed = False
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    """Add to a counter."""
+    series = _counters[name]
+    key = _labels(labels)
+    series[key] = series.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    """Record a value in a histogram."""
+    series = _histograms[name]
+    key = _labels(labels)
+    histogram = series.get(key)
+    if histogram is None:
+        histogram = series[key] = Histogram(HISTOGRAMS[name][1])
+    histogram.observe(value)
+
+
+def current_invocation():
+    """Return the slash command being handled in this task, if any."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def command_invocation(command):
+    """Time a slash command and count the Riot calls made while it runs."""
+    invocation = Invocation(command)
+    token = _current.set(invocation)
+    try:
+        yield invocation
+    finally:
+        _current.reset(token)
+        inc("bot_commands_total", command=command)
+        observe("bot_command_seconds", time.perf_counter() - invocation.started, command=command)
+        observe("bot_command_riot_calls", invocation.riot_calls, command=command)
+
+
+def record_error(command=None):
+    """Count a failed slash command, by default the one being handled in this task.
+
+    Commands that catch their own errors and reply with a message call this
+    too, and an invocation is only ever counted once.
+    """
+    invocation = _current.get()
+    if invocation is not None and command in (None, invocation.command):
+        if invocation.failed:
+            return
+        invocation.failed = True
+        command = invocation.command
+    if command is None:
+        return
+    inc("bot_command_errors_total", command=command)
+
+
+def record_upstream(endpoint, status, seconds):
+    """Record one Riot API request, and charge it to the command that made it."""
+    inc("riot_requests_total", endpoint=endpoint, status=str(status))
+    observe("riot_request_seconds", seconds, endpoint=endpoint)
+    invocation = _current.get()
+    if invocation is not None:
+        invocation.riot_calls += 1
+
+
+def record_cache(cache, hit, count=1):
+    if count:
+        inc("bot_cache_requests_total", count, cache=cache, result="hit" if hit else "miss")
+
+
+def _acknowledged():
+    invocation = _current.get()
+    if invocation is not None and not invocation.acknowledged:
+        invocation.acknowledged = True
+        observe(
+            "bot_command_ack_seconds", time.perf_counter() - invocation.started, command=invocation.command
+        )
+
+
+def instrument_responses():
+    """Wrap the interaction response methods that acknowledge a command, to time how long that takes."""
+    for name in ("defer", "send_message", "send_modal"):
+        original = getattr(nextcord.InteractionResponse, name)
+        if getattr(original, "_metrics_wrapped", False):
+            continue
+
+        def wrapper(self, *args, _original=original, **kwargs):
+            _acknowledged()
+            return _original(self, *args, **kwargs)
+
+        wrapper._metrics_wrapped = True
+        wrapper.__doc__ = original.__doc__
+        setattr(nextcord.InteractionResponse, name, wrapper)
+
+
+def counters(name):
+    """Return {labels dict items: value} of a counter."""
+    return dict(_counters[name])
+
+
+def histograms(name):
+    """Return {labels dict items: Histogram} of a histogram."""
+    return dict(_histograms[name])
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def render_prometheus():
+    """Render every metric in the Prometheus text exposition format."""
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(_counters[name].items()):
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in sorted(_histograms[name].items()):
+            cumulative = 0
+            for bound, n in zip(buckets, histogram.counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_file(text):
+    # Write then rename, so a scraper never reads a half-written file
+    temp_path = METRICS_FILE + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, METRICS_FILE)
+
+
+async def _write_loop():
+    while True:
+        try:
+            await asyncio.to_thread(_write_file, render_prometheus())
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {METRICS_FILE}: {e}")
+        await asyncio.sleep(METRICS_FILE_INTERVAL)
+
+
+async def _serve():
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    logger.info(f"Serving metrics on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+
+def start():
+    """Start the configured exporters. Safe to call on every on_ready."""
+    global _started
+    if _started:
+        return
+    _started = True
+    if METRICS_FILE:
+        _tasks.append(asyncio.create_task(_write_loop()))
+    if METRICS_PORT:
+        _tasks.append(asyncio.create_task(_serve()))
@@ -0,0 +1,189 @@
+import asyncio
+import functools
+import nextcord
+import logging
+from commands.account_resolver import get_account
+from commands.match_history import QUEUE_ID_MAPPING, stream_match_summaries
+from commands import match_index
+from commands import match_store
+from commands.embeds import send_error, send_lines
+
+logger = logging.getLogger("BotLogger")
+
+MAX_GAMES = 1000
+# Matches we don't hold yet are fetched from Riot, at most this many (newest first) per invocation
+MAX_NEW_FETCHES = 100
+FETCH_BUDGET = 60.0  # Seconds to spend fetching them before aggregating whatever we have
+TREND_WINDOW = 20  # Games per point of the rolling win rate trend
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+@functools.cache
+def _np():
+    """Import NumPy on first use, keeping it off the startup path (main.prewarm loads it after login)."""
+    import numpy
+    return numpy
+
+
+def to_columns(summaries):
+    """Turn match summaries into NumPy columns, oldest game first."""
+    np = _np()
+    summaries = sorted(
+        (s for s in summaries if not s.early_surrender), key=lambda s: s.game_creation
+    )
+    return {
+        "win": np.fromiter((s.win for s in summaries), dtype=bool, count=len(summaries)),
+        "kills": np.fromiter((s.kills for s in summaries), dtype=np.int32, count=len(summaries)),
+        "deaths": np.fromiter((s.deaths for s in summaries), dtype=np.int32, count=len(summaries)),
+        "assists": np.fromiter((s.assists for s in summaries), dtype=np.int32, count=len(summaries)),
+        "cs": np.fromiter((s.cs for s in summaries), dtype=np.int32, count=len(summaries)),
+        "minutes": np.fromiter(
+            (s.game_duration / 60 for s in summaries), dtype=np.float64, count=len(summaries)
+        ),
+        "queue_id": np.fromiter((s.queue_id for s in summaries), dtype=np.int32, count=len(summaries)),
+        "champion": np.array([s.champion for s in summaries], dtype=object),
+    }
+
+
+def _group(columns, keys):
+    """Aggregate every stat per distinct key with bincount, most played first."""
+    np = _np()
+    labels, inverse = np.unique(keys, return_inverse=True)
+    games = np.bincount(inverse, minlength=len(labels))
+    sums = {
+        name: np.bincount(inverse, weights=columns[name], minlength=len(labels))
+        for name in ("win", "kills", "deaths", "assists", "cs", "minutes")
+    }
+    order = np.argsort(-games, kind="stable")
+    return [
+        {
+            "key": labels[i],
+            "games": int(games[i]),
+            "win_rate": sums["win"][i] / games[i] * 100,
+            "kda": (sums["kills"][i] + sums["assists"][i]) / max(sums["deaths"][i], 1),
+            "cs_per_min": sums["cs"][i] / max(sums["minutes"][i], 1),
+        }
+        for i in order
+    ]
+
+
+def compute_stats(summaries):
+    """Compute overall, per-champion, per-queue and trend stats for a list of match summaries."""
+    np = _np()
+    columns = to_columns(summaries)
+    games = len(columns["win"])
+    if games == 0:
+        return None
+
+    # Rolling win rate over TREND_WINDOW games, via a cumulative sum instead of a window loop
+    window = min(TREND_WINDOW, games)
+    wins = np.concatenate(([0], np.cumsum(columns["win"])))
+    rolling = (wins[window:] - wins[:-window]) / window * 100
+
+    overall = _group(columns, np.zeros(games, dtype=np.int8))[0]
+    return {
+        "overall": overall,
+        "champions": _group(columns, columns["champion"]),
+        "queues": _group(columns, columns["queue_id"]),
+        "trend": rolling,
+        "trend_window": window,
+    }
+
+
+def sparkline(values, width=20):
+    """Render a series between 0 and 100 as a line of block characters, sampled down to `width` points."""
+    np = _np()
+    if len(values) > width:
+        values = values[np.linspace(0, len(values) - 1, width).astype(int)]
+    steps = np.clip((values / 100 * (len(SPARK_CHARS) - 1)).round().astype(int), 0, len(SPARK_CHARS) - 1)
+    return "".join(SPARK_CHARS[i] for i in steps)
+
+
+def _format_line(label, entry):
+    return (
+        f"**{label}** - {entry['games']} games | {entry['win_rate']:.0f}% WR | "
+        f"{entry['kda']:.2f} KDA | {entry['cs_per_min']:.1f} CS/min"
+    )
+
+
+def format_stats(stats, champion_limit=10):
+    """Format computed stats into readable text."""
+    if stats is None:
+        return "No games found."
+
+    trend = stats["trend"]
+    formatted_data = [
+        _format_line("Overall", stats["overall"]),
+        f"**Win rate trend** ({stats['trend_window']}-game rolling, oldest → newest): "
+        f"`{sparkline(trend)}` now {trend[-1]:.0f}%",
+        "\n**Champions:**",
+    ]
+    for entry in stats["champions"][:champion_limit]:
+        formatted_data.append(_format_line(entry["key"], entry))
+
+    formatted_data.append("\n**Queues:**")
+    for entry in stats["queues"]:
+        formatted_data.append(_format_line(QUEUE_ID_MAPPING.get(int(entry["key"]), f"Queue {entry['key']}"), entry))
+
+    return "\n".join(formatted_data)
+
+
+async def get_summaries(match_ids, puuid, max_fetches=MAX_NEW_FETCHES, budget=FETCH_BUDGET):
+    """Return the stored summaries for match_ids plus as many missing ones as the fetch limits allow.
+
+    Also returns how many matches were left out.
+    """
+    stored = await match_store.get_many(match_ids, puuid)
+    missing = [match_id for match_id in match_ids if match_id not in stored][:max_fetches]
+    fetched = []
+
+    async def collect():
+        async for summary in stream_match_summaries(missing, puuid):
+            fetched.append(summary)
+
+    if missing:
+        try:
+            await asyncio.wait_for(collect(), timeout=budget)
+        except asyncio.TimeoutError:
+            pass  # Fetched matches are stored, the next run picks up where this one stopped
+    summaries = [*stored.values(), *fetched]
+    return summaries, len(match_ids) - len(summaries)
+
+
+def add_stats_command(bot):
+    @bot.slash_command(
+        name="stats",
+        description="Show win rate, KDA and CS/min per champion and queue over a player's recent games"
+    )
+    async def stats_command(
+        interaction: nextcord.Interaction,
+        riot_id: str,
+        games: int = 100
+    ):
+        games = max(1, min(games, MAX_GAMES))
+        await interaction.response.defer()
+
+        try:
+            logger.info(f"Computing stats for {riot_id} over {games} games")
+            account = await get_account(riot_id)
+            puuid = account["puuid"]
+
+            # Only matches we don't hold yet cost a Riot call, and only a bounded number of them
+            match_ids = await match_index.get_match_ids(puuid, games)
+            summaries, skipped = await get_summaries(match_ids, puuid)
+
+            stats = compute_stats(summaries)
+            lines = format_stats(stats).split("\n")
+            if skipped:
+                lines.append(f"\n{skipped} games aren't cached yet, run the command again to include more of them.")
+            aggregated = stats["overall"]["games"] if stats else 0
+            await send_lines(
+                interaction,
+                f"Stats for {riot_id} ({aggregated} games)",
+                lines,
+            )
+
+        except Exception as e:
+            error_msg = f"Error computing stats for {riot_id}: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            await send_error(interaction, str(e))
@@ -0,0 +1,165 @@
+import asyncio
+import collections
+import io
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import logging
+import nextcord
+from loop_watchdog import find_command
+
+logger = logging.getLogger("BotLogger")
+
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples of the loop thread
+MAX_SECONDS = 120
+TOP_ALLOCATIONS = 30
+
+_lock = asyncio.Lock()  # One profile at a time
+
+
+def _frame_name(code):
+    # co_qualname is new in Python 3.11, older versions only have the bare function name
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _is_handle_run(code):
+    """Whether a frame is asyncio's Handle._run, the loop calling into a callback or task step."""
+    return code.co_name == "_run" and code.co_filename.endswith(os.path.join("asyncio", "events.py"))
+
+
+def _collapse(frame, loop):
+    """Turn a stack into one 'command;frame;frame' line, outermost frame first."""
+    command = find_command(frame)
+    frames = []
+    while frame is not None:
+        frames.append(frame.f_code)
+        frame = frame.f_back
+    frames.reverse()
+
+    # Drop the event loop's own frames above the callback it is running
+    for i in range(len(frames) - 1, -1, -1):
+        if _is_handle_run(frames[i]):
+            frames = frames[i + 1 :]
+            break
+    else:
+        # Not running a callback, so the loop is waiting for I/O or timers
+        return "idle"
+
+    if command is None:
+        task = asyncio.current_task(loop)
+        command = f"task:{task.get_name()}" if task is not None else "callback"
+    return ";".join([command, *(_frame_name(code) for code in frames)])
+
+
+class SamplingProfiler:
+    """Sample the event loop thread's stack from another thread and count identical stacks."""
+
+    def __init__(self, loop, thread_id, interval=SAMPLE_INTERVAL):
+        self.loop = loop
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples[_collapse(frame, self.loop)] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        """Collapsed stacks, one 'frame;frame count' line each, as flamegraph.pl and speedscope read them."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def format_allocations(before, after, seconds):
+    """Report the source lines whose allocations grew the most between two snapshots."""
+    ignore = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),  # The sampler itself
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ]
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    growth = sum(stat.size_diff for stat in stats)
+    lines = [f"Allocation changes over {seconds}s, top {TOP_ALLOCATIONS} lines (total {growth / 1024:+.1f} KiB)", ""]
+    lines.extend(str(stat) for stat in stats[:TOP_ALLOCATIONS])
+    return "\n".join(lines) + "\n"
+
+
+def format_summary(profiler, seconds):
+    """Summarize where the loop spent its samples, by command."""
+    total = sum(profiler.samples.values())
+    if not total:
+        return f"No samples collected in {seconds}s."
+    by_command = collections.Counter()
+    for stack, count in profiler.samples.items():
+        by_command[stack.split(";", 1)[0]] += count
+    lines = [f"Profiled the event loop for {seconds}s ({total} samples):"]
+    for command, count in by_command.most_common(10):
+        lines.append(f"**{command}** - {count / total * 100:.1f}%")
+    return "\n".join(lines)
+
+
+async def profile(seconds):
+    """Profile the running bot for a number of seconds. Returns (profiler, allocation report)."""
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profiler = SamplingProfiler(asyncio.get_running_loop(), threading.get_ident())
+    try:
+        before = tracemalloc.take_snapshot()
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            # Also on cancellation (e.g. shutdown), or the sampler thread would run forever
+            profiler.stop()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    allocations = await asyncio.to_thread(format_allocations, before, after, seconds)
+    return profiler, allocations
+
+
+def add_profile_command(bot, GUILD_IDS):
+    @bot.slash_command(
+        name="profile",
+        description="Profile the running bot and upload the samples and allocation report (owner only)",
+        guild_ids=GUILD_IDS,
+    )
+    async def profile_command(
+        interaction: nextcord.Interaction,
+        seconds: int = nextcord.SlashOption(description="How long to profile for", min_value=1, max_value=MAX_SECONDS, default=30),
+    ):
+        if not await bot.is_owner(interaction.user):
+            await interaction.response.send_message("Only the bot owner can run the profiler.", ephemeral=True)
+            return
+        if _lock.locked():
+            await interaction.response.send_message("A profile is already running.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        async with _lock:
+            logger.info(f"{interaction.user} started a {seconds}s profile")
+            profiler, allocations = await profile(seconds)
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        files = [
+            nextcord.File(io.BytesIO(profiler.collapsed().encode()), filename=f"profile-{stamp}.collapsed"),
+            nextcord.File(io.BytesIO(allocations.encode()), filename=f"allocations-{stamp}.txt"),
+        ]
+        await interaction.followup.send(format_summary(profiler, seconds), files=files, ephemeral=True)
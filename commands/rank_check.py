@@ -1,72 +1,61 @@
-import requests
 import nextcord
-from dotenv import load_dotenv
-import os
+import asyncio
 import logging
+import time
+from commands import riot_api
+from commands import metrics
+from commands.embeds import send_error, send_lines
+from commands.account_resolver import get_summoner_by_riot_id, parse_riot_id
 
-# Load the .env file
-load_dotenv()
-
-RIOT_API_KEY = os.getenv("RIOT_API_KEY")
 REGION = "na1"  # Default region
+# Ranks change at most once per game: entries younger than the soft TTL are served as-is,
+# older ones are served while a background refresh runs, past the hard TTL we wait for Riot.
+RANK_SOFT_TTL = 5 * 60
+RANK_HARD_TTL = 60 * 60
 
 logger = logging.getLogger("BotLogger")
 
-def handle_api_error(response):
-    """Handle common API errors and return a user-friendly message."""
-    if response.status_code == 429:
-        return "Slow down! Riot's servers are rate-limited."
-    elif response.status_code == 403:
-        return "Invalid API key."
-    elif response.status_code == 404:
-        return "Summoner not found. Check the Riot ID format."
-    return f"An error occurred: {response.status_code} {response.reason}"
+_league_entries = {}  # Summoner ID -> (fetched_at, entries)
+_refresh_tasks = {}  # Summoner ID -> background refresh task
 
-def fetch_summoner_rank(riot_id):
+async def _fetch_league_entries(summoner_id):
+    entries = await riot_api.get(
+        REGION,
+        "/lol/league/v4/entries/by-summoner/{}",
+        summoner_id,
+    )
+    _league_entries[summoner_id] = (time.time(), entries)
+    return entries
+
+async def _refresh_league_entries(summoner_id):
+    try:
+        await _fetch_league_entries(summoner_id)
+    except Exception as e:
+        logger.warning(f"Background rank refresh failed for {summoner_id}: {e}")
+    finally:
+        _refresh_tasks.pop(summoner_id, None)
+
+async def get_league_entries(summoner_id):
+    """Fetch the ranked queue entries for a summoner ID (stale-while-revalidate cached)."""
+    cached = _league_entries.get(summoner_id)
+    if cached is not None:
+        age = time.time() - cached[0]
+        if age < RANK_HARD_TTL:
+            if age >= RANK_SOFT_TTL and summoner_id not in _refresh_tasks:
+                _refresh_tasks[summoner_id] = asyncio.create_task(_refresh_league_entries(summoner_id))
+            metrics.record_cache("league_entries", True)
+            return cached[1]
+    metrics.record_cache("league_entries", False)
+    return await _fetch_league_entries(summoner_id)
+
+async def fetch_summoner_rank(riot_id):
     """Fetch the rank data for a summoner by Riot ID."""
-    # Step 1: Get the account by riot ID
-    # Remove any spaces and handle optional tag
-    riot_id = riot_id.replace(" ", "")
-    
-    if "#" in riot_id:
-        name, tag = riot_id.split("#")
-    else:
-        name = riot_id
-        tag = "NA1"  # Default tag if none provided
-    
-    # First, get the PUUID using the account-v1 endpoint
-    account_url = f"https://americas.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{name}/{tag}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-    
-    print(f"Requesting Account URL: {account_url}")  # Debug
-    
-    response = requests.get(account_url, headers=headers)
-    print(f"Response Code: {response.status_code}, Response Body: {response.text}")  # Debug
-    
-    if response.status_code != 200:
-        raise Exception(handle_api_error(response))
-
-    account_data = response.json()
-    puuid = account_data["puuid"]
-
-    # Step 2: Get summoner data using PUUID
-    summoner_url = f"https://{REGION}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
-    summoner_response = requests.get(summoner_url, headers=headers)
-    
-    if summoner_response.status_code != 200:
-        raise Exception(handle_api_error(summoner_response))
-
-    summoner_data = summoner_response.json()
+    # Step 1 & 2: Resolve the Riot ID to a summoner (cached after the first lookup)
+    summoner_data = await get_summoner_by_riot_id(riot_id)
     summoner_id = summoner_data["id"]  # Get the summoner ID
 
     # Step 3: Get the rank data using summoner ID
-    rank_url = f"https://{REGION}.api.riotgames.com/lol/league/v4/entries/by-summoner/{summoner_id}"
-    rank_response = requests.get(rank_url, headers=headers)
-    
-    if rank_response.status_code != 200:
-        raise Exception(handle_api_error(rank_response))
-
-    rank_data = rank_response.json()
+    rank_data = await get_league_entries(summoner_id)
     return rank_data
 
 
@@ -104,27 +93,19 @@ def add_rank_check_command(bot):
             logger.info(f"Fetching rank data for: {riot_id}")
             
             # Parse Riot ID
-            if "#" in riot_id:
-                name, tag = riot_id.split("#")
-            else:
-                name, tag = riot_id, "NA1"
+            name, tag = parse_riot_id(riot_id)
             logger.info(f"Parsed Riot ID - Name: {name}, Tag: {tag}")
             
             # Fetch and format the rank data
-            rank_data = fetch_summoner_rank(riot_id)
+            rank_data = await fetch_summoner_rank(riot_id)
             logger.info(f"Successfully fetched rank data for {riot_id}")
             
             formatted_data = format_rank_data(rank_data)
-            display_name = riot_id if "#" in riot_id else f"{riot_id}#NA1"
+            display_name = f"{name}#{tag}"
 
-            embed = nextcord.Embed(
-                title=f"Rank for {display_name}",
-                description=formatted_data,
-                color=0x1e90ff
-            )
-            await interaction.followup.send(embed=embed)
+            await send_lines(interaction, f"Rank for {display_name}", formatted_data.split("\n"))
             
         except Exception as e:
             error_msg = f"Error fetching rank data for {riot_id}: {str(e)}"
             logger.error(error_msg, exc_info=True)
-            await interaction.followup.send(str(e))
+            await send_error(interaction, str(e))
@@ -0,0 +1,148 @@
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger("BotLogger")
+
+# Development key limits, used until Riot tells us the real ones in a response
+DEFAULT_APP_LIMITS = "20:1,100:120"
+# Back-off used for a 429 that doesn't carry a Retry-After header
+DEFAULT_RETRY_AFTER = 1.0
+
+# (host,) -> app bucket, (host, method) -> method bucket
+_app_buckets = {}
+_method_buckets = {}
+# One lock per method bucket so waiting requests are served in arrival order
+_locks = {}
+
+
+def parse_limits(header):
+    """Parse a rate limit header like '20:1,100:120' into {window_seconds: value}."""
+    limits = {}
+    if not header:
+        return limits
+    for part in header.split(","):
+        value, seconds = part.strip().split(":")
+        limits[int(seconds)] = int(value)
+    return limits
+
+
+class Window:
+    """A fixed rate limit window, started by the first request made in it."""
+
+    def __init__(self, limit, seconds):
+        self.limit = limit
+        self.seconds = seconds
+        self.count = 0
+        self.reset_at = 0.0
+
+    def delay(self, now):
+        """Seconds until this window has room for another request."""
+        if now >= self.reset_at or self.count < self.limit:
+            return 0.0
+        return self.reset_at - now
+
+    def take(self, now):
+        if now >= self.reset_at:
+            self.count = 0
+            self.reset_at = now + self.seconds
+        self.count += 1
+
+    def sync(self, count, now):
+        """Catch up with the count Riot reports (requests we didn't see, e.g. before a restart)."""
+        if now >= self.reset_at:
+            self.reset_at = now + self.seconds
+            self.count = 0
+        self.count = max(self.count, count)
+
+
+class Bucket:
+    """All the windows that apply to one region (app limit) or one endpoint (method limit)."""
+
+    def __init__(self, limits_header=None):
+        self.windows = {}
+        self.blocked_until = 0.0
+        self.set_limits(parse_limits(limits_header))
+
+    def set_limits(self, limits):
+        for seconds, limit in limits.items():
+            window = self.windows.get(seconds)
+            if window:
+                window.limit = limit
+            else:
+                self.windows[seconds] = Window(limit, seconds)
+        for seconds in list(self.windows):
+            if limits and seconds not in limits:
+                del self.windows[seconds]
+
+    def delay(self, now):
+        delay = max(0.0, self.blocked_until - now)
+        for window in self.windows.values():
+            delay = max(delay, window.delay(now))
+        return delay
+
+    def take(self, now):
+        for window in self.windows.values():
+            window.take(now)
+
+    def update(self, limits_header, counts_header, now):
+        limits = parse_limits(limits_header)
+        if limits:
+            self.set_limits(limits)
+        for seconds, count in parse_limits(counts_header).items():
+            window = self.windows.get(seconds)
+            if window:
+                window.sync(count, now)
+
+    def block(self, seconds, now):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+def _buckets(host, method):
+    app = _app_buckets.get(host)
+    if app is None:
+        app = _app_buckets[host] = Bucket(DEFAULT_APP_LIMITS)
+    key = (host, method)
+    method_bucket = _method_buckets.get(key)
+    if method_bucket is None:
+        method_bucket = _method_buckets[key] = Bucket()
+        _locks[key] = asyncio.Lock()
+    return app, method_bucket, _locks[key]
+
+
+async def acquire(host, method):
+    """Wait until both the region and the endpoint have a free slot, then take it."""
+    app, method_bucket, lock = _buckets(host, method)
+    async with lock:
+        while True:
+            now = time.monotonic()
+            delay = max(app.delay(now), method_bucket.delay(now))
+            if delay <= 0:
+                app.take(now)
+                method_bucket.take(now)
+                return
+            await asyncio.sleep(delay)
+
+
+def update(host, method, headers):
+    """Update the buckets from the X-App-Rate-Limit / X-Method-Rate-Limit headers of a response."""
+    app, method_bucket, _ = _buckets(host, method)
+    now = time.monotonic()
+    app.update(headers.get("X-App-Rate-Limit"), headers.get("X-App-Rate-Limit-Count"), now)
+    method_bucket.update(
+        headers.get("X-Method-Rate-Limit"), headers.get("X-Method-Rate-Limit-Count"), now
+    )
+
+
+def back_off(host, method, headers):
+    """Block the bucket a 429 came from until its Retry-After has passed."""
+    app, method_bucket, _ = _buckets(host, method)
+    try:
+        retry_after = float(headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+    except ValueError:
+        retry_after = DEFAULT_RETRY_AFTER
+    limit_type = headers.get("X-Rate-Limit-Type", "service")
+    logger.warning(f"Riot rate limit hit ({limit_type}) on {host} {method}, retrying in {retry_after}s")
+
+    bucket = app if limit_type == "application" else method_bucket
+    bucket.block(retry_after, time.monotonic())
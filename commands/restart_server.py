@@ -1,26 +1,35 @@
 import nextcord
 from nextcord.ext import commands
-import requests
-import os
 import logging
+from config import config
 
-# Load Pterodactyl API key and URL from environment variables
-PTERODACTYL_API_KEY = os.getenv("PTERODACTYL_API_KEY")
-PTERODACTYL_URL = "https://Pterodactyl.local.McQueenLab.net/api"
+# Pterodactyl API key and URL from the central config
+PTERODACTYL_API_KEY = config.pterodactyl_api_key
+PTERODACTYL_URL = config.pterodactyl_url
 
 logger = logging.getLogger("BotLogger")
 
-HEADERS = {
-    "Authorization": f"Bearer {PTERODACTYL_API_KEY}",
-    "Accept": "application/json",
-    "Content-Type": "application/json"
-}
+_session = None
+
+def get_session():
+    """Return the Pterodactyl HTTP session, created on first use so startup doesn't pay for importing requests."""
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+        _session.headers.update({
+            "Authorization": f"Bearer {PTERODACTYL_API_KEY}",
+            "Accept": "application/json",
+            "Content-Type": "application/json"
+        })
+    return _session
 
 def get_servers():
     """Fetches a list of servers from Pterodactyl"""
+    import requests
     url = f"{PTERODACTYL_URL}/client"
     try:
-        response = requests.get(url, headers=HEADERS)
+        response = get_session().get(url)
         response.raise_for_status()
         servers = response.json().get("data", [])
         return {server["attributes"]["identifier"]: server["attributes"]["name"] for server in servers}
@@ -30,9 +39,10 @@ def get_servers():
 
 def restart_server(server_id):
     """Sends a restart request to a specified server on Pterodactyl"""
+    import requests
     url = f"{PTERODACTYL_URL}/client/servers/{server_id}/power"
     try:
-        response = requests.post(url, headers=HEADERS, json={"signal": "restart"})
+        response = get_session().post(url, json={"signal": "restart"})
         response.raise_for_status()
         return True
     except requests.RequestException as e:
@@ -0,0 +1,155 @@
+import aiohttp
+import asyncio
+from urllib.parse import quote
+import time
+import logging
+from commands import rate_limiter
+from commands import metrics
+from config import config
+
+RIOT_API_KEY = config.riot_api_key
+DDRAGON_HOST = "ddragon"  # Static data (champion.json etc.), no API key needed
+MAX_RETRIES = 3  # How many times a rate-limited (429) request is retried
+# Overridable to point the bot at a local stand-in (see fake_riot.py), {host} is the routing host
+RIOT_API_BASE_URL = config.riot_api_base_url
+DDRAGON_BASE_URL = config.ddragon_base_url
+
+logger = logging.getLogger("BotLogger")
+
+# One keep-alive session per routing host (e.g. "americas", "na1")
+_sessions = {}
+# Requests currently on the wire, keyed by (host, path, params), shared by identical callers
+_in_flight = {}
+
+
+class RiotAPIError(Exception):
+    """Raised when Riot responds with anything other than 200."""
+
+    def __init__(self, status_code, reason, error_handler=None):
+        self.status_code = status_code
+        self.reason = reason
+        handler = error_handler or handle_api_error
+        super().__init__(handler(self))
+
+
+class RiotUnavailableError(RiotAPIError):
+    """Raised when Riot couldn't be reached or didn't answer in time."""
+
+    def __init__(self, cause):
+        self.status_code = None
+        self.reason = type(cause).__name__
+        # aiohttp's timeouts have no message, so never pass theirs on to users
+        Exception.__init__(self, "Riot's servers didn't respond. Try again in a moment.")
+
+
+def handle_api_error(response):
+    """Handle common API errors and return a user-friendly message."""
+    if response.status_code == 429:
+        return "Slow down! Riot's servers are rate-limited."
+    elif response.status_code == 403:
+        return "Invalid API key."
+    elif response.status_code == 404:
+        return "Summoner not found. Check the Riot ID format."
+    return f"An error occurred: {response.status_code} {response.reason}"
+
+
+def base_url(host):
+    """Return the URL that endpoint paths of a routing host are relative to."""
+    if host == DDRAGON_HOST:
+        return DDRAGON_BASE_URL.rstrip("/")
+    return RIOT_API_BASE_URL.format(host=host).rstrip("/")
+
+
+def get_session(host):
+    """Return the shared session for a routing host, creating it on first use."""
+    session = _sessions.get(host)
+    if session is None or session.closed:
+        headers = {} if host == DDRAGON_HOST else {"X-Riot-Token": RIOT_API_KEY or ""}
+        connector = aiohttp.TCPConnector(limit_per_host=20, keepalive_timeout=60)
+        session = aiohttp.ClientSession(
+            headers=headers,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=10),
+        )
+        _sessions[host] = session
+    return session
+
+
+def build_path(path, *path_args):
+    """Fill the {} placeholders of an endpoint path with URL-quoted arguments."""
+    return path.format(*(quote(str(arg), safe="") for arg in path_args))
+
+
+async def _request(host, path, url, params):
+    session = get_session(host)
+    full_url = base_url(host) + url
+    limited = host != DDRAGON_HOST
+    for attempt in range(MAX_RETRIES + 1):
+        if limited:
+            await rate_limiter.acquire(host, path)
+        started = time.perf_counter()
+        try:
+            response = await session.get(full_url, params=params)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            metrics.record_upstream(path, "error", time.perf_counter() - started)
+            logger.warning(f"Riot request to {full_url} failed: {type(e).__name__} {e}")
+            raise RiotUnavailableError(e) from e
+        metrics.record_upstream(path, response.status, time.perf_counter() - started)
+        async with response:
+            if limited:
+                rate_limiter.update(host, path, response.headers)
+                if response.status == 429 and attempt < MAX_RETRIES:
+                    rate_limiter.back_off(host, path, response.headers)
+                    continue
+            if response.status != 200:
+                raise RiotAPIError(response.status, response.reason)
+            try:
+                return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # The total timeout also covers reading the body
+                raise RiotUnavailableError(e) from e
+
+
+async def get(host, path, *path_args, params=None, error_handler=None):
+    """GET a Riot endpoint and return the decoded JSON body.
+
+    `path` is the endpoint template (e.g. "/lol/match/v5/matches/{}") and
+    `path_args` fill its placeholders. The template is also the method
+    rate limit bucket, so every request waits for a free slot first.
+
+    Identical requests made while one is already in flight share its
+    response instead of costing another call against the rate limit.
+    The returned JSON may be shared between callers, so don't mutate it.
+    """
+    url = build_path(path, *path_args)
+    key = (host, url, tuple(sorted((params or {}).items())))
+    future = _in_flight.get(key)
+    metrics.record_cache("riot_in_flight", future is not None)
+    if future is None:
+        future = asyncio.ensure_future(_request(host, path, url, params))
+        _in_flight[key] = future
+        future.add_done_callback(lambda done: _request_done(key, done))
+
+    try:
+        # Shielded so one caller giving up doesn't cancel the request for the others
+        return await asyncio.shield(future)
+    except RiotUnavailableError:
+        raise
+    except RiotAPIError as e:
+        # Each caller gets the error worded by its own handler
+        raise RiotAPIError(e.status_code, e.reason, error_handler) from None
+
+
+def _request_done(key, future):
+    if _in_flight.get(key) is future:
+        del _in_flight[key]
+    if not future.cancelled():
+        future.exception()  # Mark as retrieved even if every caller went away
+
+
+async def close():
+    """Close every open session. Call this once when the bot shuts down."""
+    for session in _sessions.values():
+        if not session.closed:
+            await session.close()
+    _sessions.clear()
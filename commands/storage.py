@@ -0,0 +1,24 @@
+import os
+import sqlite3
+from config import config
+
+# Where the bot keeps its on-disk caches (match data, resolved accounts, ...)
+CACHE_DIR = config.cache_dir
+
+
+def cache_path(filename):
+    """Return the path of a file inside the cache directory, creating the directory if needed."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+
+def connect(filename):
+    """Open a SQLite database in the cache directory.
+
+    The connection is shared with worker threads (asyncio.to_thread), so callers
+    must serialize access to it themselves.
+    """
+    conn = sqlite3.connect(cache_path(filename), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
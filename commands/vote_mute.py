@@ -3,6 +3,9 @@ from nextcord.ext import commands
 import asyncio
 import os
 
+# The sound played when a vote starts, loaded from disk only when a vote happens
+VOTE_SOUND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vote_to_mute.mp3")
+
 async def vote_mute(interaction: nextcord.Interaction, user: nextcord.Member):
     """Initiate a vote to mute a user in voice chat and play a sound upon command invocation."""
     # Ensure the command issuer is in a voice channel
@@ -22,7 +25,7 @@ async def vote_mute(interaction: nextcord.Interaction, user: nextcord.Member):
     # Try to connect to the voice channel and handle errors
     try:
         vc = await channel.connect()
-        audio_source = nextcord.FFmpegPCMAudio("/home/serveradmin/gggamers-discord-bot/commands/vote_to_mute.mp3")
+        audio_source = nextcord.FFmpegPCMAudio(VOTE_SOUND)
 
         if not vc.is_playing():
             vc.play(audio_source)
@@ -1,5 +1,54 @@
-#from dotenv import load_dotenv
-#import os
+import os
+from dotenv import load_dotenv
 
-#load_dotenv()
-#TOKEN = os.getenv("DISCORD_BOT_TOKEN")
\ No newline at end of file
+
+def _int_list(value):
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def _optional_int(value):
+    return int(value) if value else None
+
+
+class Config:
+    """Every setting the bot reads from the environment (or .env). Built once, at first import."""
+
+    def __init__(self, env):
+        # Discord
+        self.discord_token = env.get("DISCORD_BOT_TOKEN")
+        self.guild_ids = _int_list(env.get("GUILD_IDS", ""))
+        self.log_channel_id = int(env.get("LOG_CHANNEL_ID", "1336254169656590409"))
+
+        # Logging and diagnostics
+        self.log_file = env.get("LOG_FILE", "bot.log")
+        self.log_max_bytes = int(env.get("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+        self.log_backup_count = int(env.get("LOG_BACKUP_COUNT", "5"))
+        self.loop_stall_threshold = float(env.get("LOOP_STALL_THRESHOLD", "0.5"))
+        self.metrics_file = env.get("METRICS_FILE")
+        self.metrics_host = env.get("METRICS_HOST", "127.0.0.1")
+        self.metrics_port = _optional_int(env.get("METRICS_PORT"))
+
+        # Riot API and caches
+        self.riot_api_key = env.get("RIOT_API_KEY")
+        self.riot_api_base_url = env.get("RIOT_API_BASE_URL", "https://{host}.api.riotgames.com")
+        self.ddragon_base_url = env.get("DDRAGON_BASE_URL", "https://ddragon.leagueoflegends.com")
+        self.cache_dir = env.get(
+            "BOT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+        )
+        self.match_cache_max_matches = int(env.get("MATCH_CACHE_MAX_MATCHES", "100000"))
+        self.match_cache_memory_summaries = int(env.get("MATCH_CACHE_MEMORY_SUMMARIES", "50000"))
+        self.match_fetch_concurrency = int(env.get("MATCH_FETCH_CONCURRENCY", "10"))
+
+        # Other services
+        self.pterodactyl_api_key = env.get("PTERODACTYL_API_KEY")
+        self.pterodactyl_url = env.get("PTERODACTYL_URL", "https://Pterodactyl.local.McQueenLab.net/api")
+        self.openai_api_key = env.get("OPENAI_API_KEY")
+
+
+def load():
+    """Read .env into the environment and build the settings from it."""
+    load_dotenv()
+    return Config(os.environ)
+
+
+config = load()
@@ -0,0 +1,391 @@
+# Local stand-in for the Riot API and Data Dragon, serving the fixture corpus in fixtures/riot.
+#
+#   python fake_riot.py --port 8099 --latency 40 --jitter 20 --rate-429 0.02 --error-rate 0.01
+#   RIOT_API_BASE_URL=http://127.0.0.1:8099/{host} DDRAGON_BASE_URL=http://127.0.0.1:8099/ddragon python main.py
+#
+# Fixtures are plain JSON files laid out like the URLs they answer, e.g.
+# fixtures/riot/na1/lol/league/v4/entries/by-summoner/<id>.json. Rebuild the synthetic
+# corpus with --generate, or add real responses with --record (needs RIOT_API_KEY).
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+from collections import Counter
+from aiohttp import web
+import aiohttp
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "riot")
+DDRAGON_HOST = "ddragon"
+RIOT_URL = "https://{host}.api.riotgames.com"
+DDRAGON_URL = "https://ddragon.leagueoflegends.com"
+
+
+def riot_error(status, message, headers=None):
+    """A response shaped like Riot's own error bodies."""
+    return web.json_response({"status": {"message": message, "status_code": status}}, status=status, headers=headers)
+
+
+class AppLimit:
+    """Riot's per-region application rate limit, as fixed windows."""
+
+    def __init__(self, header):
+        self.header = header
+        self.windows = {}  # seconds -> [limit, count, reset_at]
+        for part in header.split(","):
+            limit, seconds = part.split(":")
+            self.windows[int(seconds)] = [int(limit), 0, 0.0]
+
+    def take(self, now):
+        """Count a request. Returns seconds to wait if it is over the limit, else 0."""
+        for seconds, window in self.windows.items():
+            if now >= window[2]:
+                window[1], window[2] = 0, now + seconds
+        retry_after = max((reset_at - now for limit, count, reset_at in self.windows.values() if count >= limit), default=0)
+        if retry_after:
+            return retry_after
+        for window in self.windows.values():
+            window[1] += 1
+        return 0
+
+    def headers(self):
+        counts = ",".join(f"{count}:{seconds}" for seconds, (limit, count, reset_at) in self.windows.items())
+        return {"X-App-Rate-Limit": self.header, "X-App-Rate-Limit-Count": counts}
+
+
+class FakeRiot:
+    def __init__(self, corpus=DEFAULT_CORPUS, latency=0.0, jitter=0.0, rate_429=0.0, error_rate=0.0,
+                 app_limit="20000:1,1000000:120", record=False, seed=None):
+        self.corpus = os.path.abspath(corpus)
+        self.latency = latency  # Seconds
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.error_rate = error_rate
+        self.app_limit = app_limit
+        self.record = record
+        self.random = random.Random(seed)
+        self.limits = {}  # host -> AppLimit
+        self.requests = Counter()  # "host /path" -> requests served
+        self._fixtures = {}
+        self._record_session = None
+
+    def _fixture_path(self, host, path):
+        full_path = os.path.abspath(os.path.join(self.corpus, host, path.lstrip("/") + ".json"))
+        if not full_path.startswith(self.corpus + os.sep):
+            return None
+        return full_path
+
+    def load(self, host, path):
+        """Return the fixture for a request path, or None. Riot IDs are matched case-insensitively."""
+        key = (host, path)
+        if key not in self._fixtures:
+            data = None
+            for candidate in (path, path.casefold()):
+                full_path = self._fixture_path(host, candidate)
+                if full_path and os.path.exists(full_path):
+                    with open(full_path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    break
+            self._fixtures[key] = data
+        return self._fixtures[key]
+
+    def save(self, host, path, data):
+        full_path = self._fixture_path(host, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        self._fixtures[(host, path)] = data
+
+    def _match_ids(self, host, path, query):
+        """by-puuid/{}/ids: filter and page the player's full ID list like match-v5 does."""
+        match_ids = self.load(host, path)
+        if match_ids is None:
+            return None
+        start_time = int(query.get("startTime", 0))
+        end_time = int(query.get("endTime", 2 ** 62))
+        if "startTime" in query or "endTime" in query:
+            kept = []
+            for match_id in match_ids:
+                match = self.load(host, f"/lol/match/v5/matches/{match_id}")
+                created = match["info"]["gameCreation"] // 1000 if match else 0
+                if start_time <= created <= end_time:
+                    kept.append(match_id)
+            match_ids = kept
+        if "queue" in query:
+            match_ids = [
+                match_id for match_id in match_ids
+                if (self.load(host, f"/lol/match/v5/matches/{match_id}") or {}).get("info", {}).get("queueId")
+                == int(query["queue"])
+            ]
+        start = int(query.get("start", 0))
+        return match_ids[start : start + int(query.get("count", 20))]
+
+    def _top_mastery(self, host, path, query):
+        """champion-masteries/by-puuid/{}/top: derived from the full mastery list."""
+        masteries = self.load(host, path[: -len("/top")])
+        if masteries is None:
+            return None
+        masteries = sorted(masteries, key=lambda entry: -entry["championPoints"])
+        return masteries[: int(query.get("count", 3))]
+
+    def answer(self, host, path, query):
+        if host != DDRAGON_HOST:
+            if path.startswith("/lol/match/v5/matches/by-puuid/") and path.endswith("/ids"):
+                return self._match_ids(host, path, query)
+            if path.startswith("/lol/champion-mastery/v4/") and path.endswith("/top"):
+                return self._top_mastery(host, path, query)
+        return self.load(host, path)
+
+    async def _record(self, host, path, query):
+        """Fetch a missing fixture from the real API and add it to the corpus."""
+        if self._record_session is None:
+            self._record_session = aiohttp.ClientSession(
+                headers={"X-Riot-Token": os.getenv("RIOT_API_KEY", "")}
+            )
+        if host == DDRAGON_HOST:
+            url, params = DDRAGON_URL + path, query
+        else:
+            url, params = RIOT_URL.format(host=host) + path, query
+            if path.endswith("/ids"):
+                # Store the whole list, the server pages it itself
+                params = {"start": 0, "count": 100}
+            elif path.endswith("/top") and path.startswith("/lol/champion-mastery/"):
+                path = path[: -len("/top")]
+                url, params = RIOT_URL.format(host=host) + path, {}
+        async with self._record_session.get(url, params=params) as response:
+            if response.status != 200:
+                return False
+            self.save(host, path, await response.json(content_type=None))
+            return True
+
+    async def handle(self, request):
+        host = request.match_info["host"]
+        path = "/" + request.match_info["path"]
+        query = request.query
+        self.requests[f"{host} {path}"] += 1
+
+        delay = self.latency + (self.random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        headers = {}
+        if host != DDRAGON_HOST:
+            limit = self.limits.setdefault(host, AppLimit(self.app_limit))
+            retry_after = limit.take(time.monotonic())
+            headers.update(limit.headers())
+            if retry_after:
+                headers.update({"Retry-After": str(math.ceil(retry_after)), "X-Rate-Limit-Type": "application"})
+                return riot_error(429, "Rate limit exceeded", headers)
+            if self.random.random() < self.rate_429:
+                headers.update({"Retry-After": "1", "X-Rate-Limit-Type": "method"})
+                return riot_error(429, "Rate limit exceeded", headers)
+        if self.random.random() < self.error_rate:
+            status = self.random.choice((500, 503))
+            return riot_error(status, "Internal server error" if status == 500 else "Service unavailable")
+
+        data = self.answer(host, path, query)
+        if data is None and self.record and await self._record(host, path, query):
+            data = self.answer(host, path, query)
+        if data is None:
+            return riot_error(404, "Data not found")
+        return web.json_response(data, headers=headers)
+
+    async def stats(self, request):
+        """Requests served so far, for benchmarks to count upstream calls."""
+        return web.json_response({"total": sum(self.requests.values()), "by_path": dict(self.requests)})
+
+    async def reset(self, request):
+        self.requests.clear()
+        self.limits.clear()
+        return web.json_response({"total": 0})
+
+    async def close(self, app):
+        if self._record_session is not None:
+            await self._record_session.close()
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/_stats", self.stats)
+        app.router.add_post("/_reset", self.reset)
+        app.router.add_get("/{host}/{path:.+}", self.handle)
+        app.on_cleanup.append(self.close)
+        return app
+
+
+async def serve(fake, host="127.0.0.1", port=8099):
+    """Start the server on the running loop. Returns the runner, clean up with `await runner.cleanup()`."""
+    runner = web.AppRunner(fake.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+# Synthetic corpus
+
+CHAMPIONS = [
+    (266, "Aatrox", "Aatrox"), (103, "Ahri", "Ahri"), (84, "Akali", "Akali"), (22, "Ashe", "Ashe"),
+    (53, "Blitzcrank", "Blitzcrank"), (51, "Caitlyn", "Caitlyn"), (122, "Darius", "Darius"),
+    (81, "Ezreal", "Ezreal"), (86, "Garen", "Garen"), (104, "Graves", "Graves"), (39, "Irelia", "Irelia"),
+    (222, "Jinx", "Jinx"), (145, "Kaisa", "Kai'Sa"), (10, "Kayle", "Kayle"), (64, "LeeSin", "Lee Sin"),
+    (99, "Lux", "Lux"), (21, "MissFortune", "Miss Fortune"), (25, "Morgana", "Morgana"),
+    (555, "Pyke", "Pyke"), (92, "Riven", "Riven"), (235, "Senna", "Senna"), (412, "Thresh", "Thresh"),
+    (157, "Yasuo", "Yasuo"), (238, "Zed", "Zed"),
+]
+PLAYERS = ["Gggamer", "Rhys", "Jack", "Mia", "Tom", "Zed Main", "Kayle Enjoyer", "Support Diff"]
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+QUEUES = [420, 420, 420, 440, 400, 450, 700]
+VERSIONS = ["14.20.1", "14.19.1", "14.18.1"]
+TIERS = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "EMERALD", "DIAMOND"]
+DIVISIONS = ["IV", "III", "II", "I"]
+
+
+def _puuid(name):
+    return "fake-" + hashlib.sha256(name.encode()).hexdigest()[:73]
+
+
+def generate(corpus=DEFAULT_CORPUS, match_count=40, seed=1):
+    """Write a deterministic synthetic corpus covering every endpoint the bot calls."""
+    rng = random.Random(seed)
+    fake = FakeRiot(corpus)
+    now = int(time.time()) * 1000
+
+    fake.save(DDRAGON_HOST, "/api/versions.json", VERSIONS)
+    fake.save(DDRAGON_HOST, f"/cdn/{VERSIONS[0]}/data/en_US/champion.json", {
+        "type": "champion",
+        "version": VERSIONS[0],
+        "data": {cid: {"id": cid, "key": str(key), "name": name} for key, cid, name in CHAMPIONS},
+    })
+
+    players = []
+    for i, name in enumerate(PLAYERS):
+        puuid = _puuid(name)
+        summoner_id = f"fake-summoner-{i:02d}"
+        players.append({"name": name, "puuid": puuid, "summoner_id": summoner_id})
+        fake.save("americas", f"/riot/account/v1/accounts/by-riot-id/{name.casefold()}/na1",
+                  {"puuid": puuid, "gameName": name, "tagLine": "NA1"})
+        fake.save("americas", f"/riot/account/v1/accounts/by-puuid/{puuid}",
+                  {"puuid": puuid, "gameName": name, "tagLine": "NA1"})
+        summoner = {
+            "id": summoner_id, "accountId": f"fake-account-{i:02d}", "puuid": puuid,
+            "profileIconId": 4000 + i, "revisionDate": now, "summonerLevel": rng.randint(30, 600),
+        }
+        fake.save("na1", f"/lol/summoner/v4/summoners/by-puuid/{puuid}", summoner)
+        fake.save("na1", f"/lol/summoner/v4/summoners/{summoner_id}", summoner)
+
+        entries = []
+        for queue_type in ("RANKED_SOLO_5x5", "RANKED_FLEX_SR"):
+            if rng.random() < 0.8:
+                entries.append({
+                    "leagueId": f"fake-league-{i}-{queue_type}", "queueType": queue_type,
+                    "tier": rng.choice(TIERS), "rank": rng.choice(DIVISIONS), "summonerId": summoner_id,
+                    "puuid": puuid, "leaguePoints": rng.randint(0, 99),
+                    "wins": rng.randint(5, 200), "losses": rng.randint(5, 200),
+                    "veteran": False, "inactive": False, "freshBlood": False, "hotStreak": rng.random() < 0.2,
+                })
+        fake.save("na1", f"/lol/league/v4/entries/by-summoner/{summoner_id}", entries)
+
+        fake.save("na1", f"/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}", [
+            {
+                "puuid": puuid, "championId": key, "championLevel": rng.randint(1, 40),
+                "championPoints": rng.randint(500, 900000), "lastPlayTime": now - rng.randint(0, 10 ** 10),
+            }
+            for key, _, _ in rng.sample(CHAMPIONS, 12)
+        ])
+
+    # The first five players are a Clash team, the rest aren't registered
+    team_id = "fake-team-1"
+    registration = now + 3 * 24 * 3600 * 1000
+    fake.save("na1", "/lol/clash/v1/tournaments", [{
+        "id": 9001, "themeId": 1, "nameKey": "fake_cup", "nameKeySecondary": "day_1",
+        "name": "fake_cup",
+        "schedule": [{"id": 9101, "registrationTime": registration, "startTime": registration + 5 * 3600 * 1000,
+                      "cancelled": False}],
+    }])
+    team_players = [
+        {"summonerId": player["summoner_id"], "puuid": player["puuid"], "teamId": team_id,
+         "position": POSITIONS[i], "role": "CAPTAIN" if i == 0 else "MEMBER"}
+        for i, player in enumerate(players[:5])
+    ]
+    fake.save("na1", f"/lol/clash/v1/teams/{team_id}", {
+        "id": team_id, "tournamentId": 9001, "name": "Gggamers", "iconId": 1, "tier": 3,
+        "captain": players[0]["summoner_id"], "abbreviation": "GGG", "players": team_players,
+    })
+    for i, player in enumerate(players):
+        fake.save("na1", f"/lol/clash/v1/players/by-summoner/{player['summoner_id']}",
+                  [team_players[i]] if i < 5 else [])
+
+    # Matches, newest first, each with a few of our players and strangers filling the lobby
+    match_ids = {player["puuid"]: [] for player in players}
+    created = now - 3600 * 1000
+    for n in range(match_count):
+        match_id = f"NA1_{5100000000 - n}"
+        queue_id = rng.choice(QUEUES)
+        duration = rng.randint(900, 2400)
+        created -= rng.randint(duration + 300, 12 * 3600) * 1000
+        lobby = rng.sample(players, rng.randint(2, 5))
+        puuids = [player["puuid"] for player in lobby]
+        puuids += [_puuid(f"stranger-{n}-{i}") for i in range(10 - len(puuids))]
+        rng.shuffle(puuids)
+        winner = rng.choice((100, 200))
+        surrendered = rng.random() < 0.03
+        participants = []
+        for i, puuid in enumerate(puuids):
+            key, champion_id, _ = rng.choice(CHAMPIONS)
+            team = 100 if i < 5 else 200
+            participants.append({
+                "puuid": puuid, "riotIdGameName": next((p["name"] for p in lobby if p["puuid"] == puuid), "Stranger"),
+                "riotIdTagline": "NA1", "championId": key, "championName": champion_id,
+                "teamId": team, "teamPosition": POSITIONS[i % 5], "win": team == winner,
+                "kills": rng.randint(0, 15), "deaths": rng.randint(0, 12), "assists": rng.randint(0, 20),
+                "totalMinionsKilled": rng.randint(10, 300), "neutralMinionsKilled": rng.randint(0, 150),
+                "teamEarlySurrendered": surrendered, "gameEndedInEarlySurrender": surrendered,
+            })
+            if puuid in match_ids:
+                match_ids[puuid].append(match_id)
+        fake.save("americas", f"/lol/match/v5/matches/{match_id}", {
+            "metadata": {"dataVersion": "2", "matchId": match_id, "participants": puuids},
+            "info": {
+                "gameCreation": created, "gameDuration": 300 if surrendered else duration,
+                "gameMode": "ARAM" if queue_id == 450 else "CLASSIC", "queueId": queue_id,
+                "platformId": "NA1", "participants": participants,
+            },
+        })
+    for puuid, ids in match_ids.items():
+        fake.save("americas", f"/lol/match/v5/matches/by-puuid/{puuid}/ids", ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded Riot API and Data Dragon responses locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Fixture directory")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added response time in milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- milliseconds on top of --latency")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered with a 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 5xx")
+    parser.add_argument("--app-limit", default="20000:1,1000000:120",
+                        help="Enforced application rate limit, e.g. 20:1,100:120 for a development key")
+    parser.add_argument("--seed", type=int, help="Seed for latency and fault injection")
+    parser.add_argument("--record", action="store_true", help="Fetch and save fixtures missing from the corpus")
+    parser.add_argument("--generate", action="store_true", help="Write the synthetic corpus and exit")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.corpus)
+        print(f"Wrote synthetic corpus to {args.corpus}")
+        return
+
+    fake = FakeRiot(
+        args.corpus, args.latency / 1000, args.jitter / 1000, args.rate_429, args.error_rate,
+        args.app_limit, args.record, args.seed,
+    )
+    print(f"Fake Riot API on http://{args.host}:{args.port}, point the bot at it with:")
+    print(f"  RIOT_API_BASE_URL=http://{args.host}:{args.port}/{{host}} DDRAGON_BASE_URL=http://{args.host}:{args.port}/ddragon")
+    web.run_app(fake.app(), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import logging
+import nextcord
+from commands import metrics
+from config import config
+
+logger = logging.getLogger("BotLogger")
+
+# How often the loop checks in, and how late a check-in has to be to count as a stall
+HEARTBEAT_INTERVAL = 0.1
+STALL_THRESHOLD = config.loop_stall_threshold
+STACK_DEPTH = 30  # Innermost frames to log
+
+_loop = None
+_loop_thread_id = None
+_last_beat = 0.0
+_stall = None  # Description of the stall currently being reported, set by the watchdog thread
+_heartbeat_task = None
+
+
+def find_command(frame):
+    """Walk a stack outwards and name the slash command whose handler is on it, if any."""
+    while frame is not None:
+        interaction = frame.f_locals.get("interaction")
+        if isinstance(interaction, nextcord.Interaction):
+            command = interaction.application_command
+            if command is not None:
+                return f"/{command.name}"
+            data = interaction.data or {}
+            return f"/{data['name']}" if "name" in data else f"{interaction.type.name} interaction"
+        frame = frame.f_back
+    return None
+
+
+def _describe_stall():
+    """Capture what the loop thread is doing right now."""
+    frame = sys._current_frames().get(_loop_thread_id)
+    if frame is None:
+        return "unknown", ""
+    command = find_command(frame)
+    if command is None:
+        task = asyncio.current_task(_loop)
+        command = f"task {task.get_name()}" if task is not None else "a loop callback"
+    # format_stack's limit keeps the innermost frames when negative
+    return command, "".join(traceback.format_stack(frame, limit=-STACK_DEPTH))
+
+
+def _watch():
+    global _stall
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL)
+        if _heartbeat_task is None or _heartbeat_task.done():
+            continue  # Stopped, a missing heartbeat isn't a stall
+        lag = time.perf_counter() - _last_beat
+        if lag < STALL_THRESHOLD or _stall is not None:
+            continue
+        _stall, stack = _describe_stall()
+        logger.warning(f"Event loop blocked for {lag:.2f}s so far in {_stall}, loop thread is at:\n{stack}")
+
+
+async def _heartbeat():
+    global _last_beat, _stall
+    while True:
+        _last_beat = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lag = time.perf_counter() - _last_beat - HEARTBEAT_INTERVAL
+        metrics.observe("bot_loop_lag_seconds", max(lag, 0.0))
+        if _stall is not None:
+            logger.warning(f"Event loop stall in {_stall} ended after {lag:.2f}s")
+            metrics.inc("bot_loop_stalls_total", command=_stall)
+            _stall = None
+
+
+def start():
+    """Start measuring event-loop lag and reporting stalls. Safe to call more than once."""
+    global _loop, _loop_thread_id, _last_beat, _heartbeat_task
+    if _heartbeat_task is not None and not _heartbeat_task.done():
+        return
+    first_start = _loop is None
+    _loop = asyncio.get_running_loop()
+    _loop_thread_id = threading.get_ident()
+    _last_beat = time.perf_counter()
+    _heartbeat_task = asyncio.create_task(_heartbeat())
+    if first_start:
+        threading.Thread(target=_watch, name="loop-watchdog", daemon=True).start()
+
+
+def stop():
+    """Stop the heartbeat, e.g. before the bot shuts down."""
+    global _heartbeat_task
+    if _heartbeat_task is not None:
+        _heartbeat_task.cancel()
+        _heartbeat_task = None
@@ -1,7 +1,9 @@
-import os
+import time
+_started = time.perf_counter()  # Startup is measured from here to the first on_ready
+
 import nextcord
 from nextcord.ext import commands
-#from config import TOKEN
+from config import config
 from commands.setup_roles import setup_roles, add_reaction_handler
 from commands.vote_mute import vote_mute
 from commands.get_scammed import add_scam_command
@@ -11,64 +13,157 @@ from commands.jar_counter import add_jar_commands
 from commands.rank_check import add_rank_check_command
 from commands.clash_check import add_clash_command
 from commands.mastery import add_mastery_command
+from commands.player_stats import add_stats_command
 from commands.restart_server import add_restart_command
+from commands.bot_stats import add_botstats_command
+from commands.profiler import add_profile_command
+from commands import command_sync
+from commands import riot_api
+from commands import data_dragon
+from commands import metrics
+from bot_logging import setup_logging
+import loop_watchdog
 
 
-from dotenv import load_dotenv
-import os
+import importlib
 import logging
 import asyncio
+import collections
 
-# Load .env file
-load_dotenv()
-#Load Variables:
-TOKEN = os.getenv("DISCORD_BOT_TOKEN")
-GUILD_IDS = list(map(int, os.getenv("GUILD_IDS", "").split(",")))
+#Load Variables (config.py reads .env once for every module):
+TOKEN = config.discord_token
+GUILD_IDS = config.guild_ids
 
-# Configure global logger with more detailed settings
-logging.basicConfig(level=logging.INFO)
+# Configure logging: a background thread writes the rotating JSON log file and the
+# console, so logging never blocks the event loop
+setup_logging(logging.INFO)
 logger = logging.getLogger("BotLogger")
 
-# Create file handler
-file_handler = logging.FileHandler("bot.log")
-file_handler.setFormatter(logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-))
-logger.addHandler(file_handler)
-
-# Create console handler
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-))
-logger.addHandler(console_handler)
-
 # Add Discord logging handler
 class DiscordLoggingHandler(logging.Handler):
-    def __init__(self, bot, channel_id):
+    """Queue log records and post them to a Discord channel in batched code blocks.
+
+    Records are flushed every `flush_interval` seconds, or sooner once a full
+    message worth of text is waiting, but never within `min_interval` seconds
+    of the previous flush. Each flush sends at most `max_messages` messages.
+    Records that don't fit, or that arrive while the queue is full, are
+    dropped and counted, and the count is reported in the next batch.
+    """
+    MESSAGE_LIMIT = 2000  # Discord's message length limit
+    BLOCK_OVERHEAD = len("```\n\n```")
+
+    def __init__(self, bot, channel_id, flush_interval=5.0, max_queue=500, min_interval=2.0, max_messages=2):
         super().__init__()
         self.bot = bot
         self.channel_id = channel_id
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.min_interval = min_interval
+        self.max_messages = max_messages
+        self._last_flush = 0.0
+        self.queue = collections.deque()
+        self.queued_chars = 0
+        self.dropped = 0
+        self._loop = None
+        self._wakeup = None
+        self._task = None
 
-    async def log_to_discord(self, record):
+    def start(self):
+        """Start the background flusher. Must be called from the bot's event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def emit(self, record):
+        # Runs on whichever thread logged (the event loop, to_thread workers, the loop watchdog) with
+        # self.lock held, since Handler.handle takes it, and _batches takes it too
+        try:
+            message = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        # Truncate message if it's too long for Discord
+        limit = self.MESSAGE_LIMIT - self.BLOCK_OVERHEAD
+        if len(message) > limit:
+            message = message[: limit - 3] + "..."
+
+        if len(self.queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self.queue.append(message)
+        self.queued_chars += len(message) + 1
+        # A full message is waiting, don't wait for the interval
+        if self.queued_chars >= limit and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            # A size-triggered wakeup during a log storm still waits out the gap since the last flush
+            delay = self._last_flush + self.min_interval - self._loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._wakeup.clear()
+            await self.flush_async()
+
+    def _batches(self, max_messages=None):
+        """Drain the queue into code-block messages of at most MESSAGE_LIMIT characters.
+
+        Records beyond `max_messages` messages are counted as dropped.
+        """
+        lines = []
+        with self.lock:
+            if self.dropped:
+                lines.append(f"... {self.dropped} log records dropped (queue full or over the send rate)")
+                self.dropped = 0
+            lines.extend(self.queue)
+            self.queue.clear()
+            self.queued_chars = 0
+
+        batches = []
+        batch, size = [], 0
+        limit = self.MESSAGE_LIMIT - self.BLOCK_OVERHEAD
+        for i, line in enumerate(lines):
+            if batch and size + len(line) + 1 > limit:
+                batches.append("\n".join(batch))
+                batch, size = [], 0
+                if max_messages is not None and len(batches) >= max_messages:
+                    with self.lock:
+                        self.dropped += len(lines) - i
+                    return batches
+            batch.append(line)
+            size += len(line) + 1
+        if batch:
+            batches.append("\n".join(batch))
+        return batches
+
+    async def flush_async(self, max_messages=None):
+        """Send what is queued right now, at most `max_messages` messages (self.max_messages by default)."""
+        batches = self._batches(max_messages or self.max_messages)
+        if not batches:
+            return
+        if self._loop:
+            self._last_flush = self._loop.time()
         channel = self.bot.get_channel(self.channel_id)  # Use the channel_id from init
-        if channel:
+        if not channel:
+            # Not logged through the logger, it would just queue up here again
+            print(f"Could not find Discord channel with ID: {self.channel_id}")
+            return
+        for batch in batches:
             try:
-                message = self.format(record)
-                # Truncate message if it's too long for Discord
-                if len(message) > 1900:
-                    message = message[:1900] + "..."
-                await channel.send(f"```\n{message}\n```")
+                await channel.send(f"```\n{batch}\n```")
             except Exception as e:
                 print(f"Failed to send log to Discord: {e}")
-                logger.error(f"Failed to send log to Discord: {e}", exc_info=True)
-        else:
-            print(f"Could not find Discord channel with ID: {self.channel_id}")
-            logger.error(f"Could not find Discord channel with ID: {self.channel_id}")
 
-    def emit(self, record):
-        # Create task to send log asynchronously
-        asyncio.create_task(self.log_to_discord(record))
+    async def aclose(self):
+        """Stop the flusher and send whatever is still queued. Call before the bot disconnects."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush_async()
 
 # Bot Configuration
 intents = nextcord.Intents.default()
@@ -77,27 +172,77 @@ intents.reactions = True
 intents.guilds = True
 intents.members = True
 
-bot = commands.Bot(intents=intents)
+discord_handler = None
+startup_done = False  # on_ready fires again after every reconnect
+
+class Bot(commands.Bot):
+    async def process_application_commands(self, interaction):
+        # Time every slash command and count the Riot calls it makes (see /botstats)
+        if interaction.type is not nextcord.InteractionType.application_command:
+            return await super().process_application_commands(interaction)
+        with metrics.command_invocation(interaction.data.get("name", "unknown")):
+            await super().process_application_commands(interaction)
+
+    async def on_connect(self):
+        # nextcord re-uploads every command on each (re)connect by default, only do it when they changed
+        self.add_all_application_commands()
+        await command_sync.sync_commands(self)
+
+    async def on_guild_available(self, guild):
+        await command_sync.sync_commands(self, guild.id)
+
+    async def close(self):
+        loop_watchdog.stop()
+        # Flush queued Discord logs while we still have a connection
+        if discord_handler:
+            await discord_handler.aclose()
+        # Close the shared Riot API sessions before the loop goes away
+        await riot_api.close()
+        await super().close()
+
+bot = Bot(intents=intents)
+metrics.instrument_responses()
+
+async def prewarm():
+    """Load what the first commands would otherwise wait for, without holding up login."""
+    # Load the champion map in the background so /mastery never waits on Data Dragon
+    data_dragon.start()
+    # NumPy is only imported by /stats, import it off the loop so the first /stats doesn't pay for it
+    try:
+        await asyncio.to_thread(importlib.import_module, "numpy")
+    except Exception as e:
+        logger.warning(f"Failed to prewarm numpy: {e}")
 
 @bot.event
 async def on_ready():
-    logger.info(f"Bot logged in as {bot.user}")
-    print(f"Bot logged in as {bot.user}")
+    global discord_handler, startup_done
+    if startup_done:
+        logger.info(f"Bot reconnected as {bot.user}")
+        return
+    startup_done = True
+    ready = time.perf_counter() - _started
+    logger.info(f"Bot logged in as {bot.user}, ready in {ready:.2f}s (imports and setup {_imported - _started:.2f}s)")
+    print(f"Bot logged in as {bot.user}, ready in {ready:.2f}s")
+
+    # Warm up Data Dragon and heavy imports now that we are online
+    asyncio.create_task(prewarm(), name="prewarm")
+
+    # Export metrics to METRICS_FILE / METRICS_PORT if configured
+    metrics.start()
+
+    # Log the stack of anything that blocks the event loop for too long
+    loop_watchdog.start()
     
     # Add Discord handler after bot is ready
-    discord_handler = DiscordLoggingHandler(bot, 1336254169656590409)
+    discord_handler = DiscordLoggingHandler(bot, config.log_channel_id)
     discord_handler.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
     # Change to INFO level to see all logs
     discord_handler.setLevel(logging.INFO)
+    discord_handler.start()
     logger.addHandler(discord_handler)
     
     # Test message to verify Discord logging
     logger.info("Bot startup complete - Discord logging test message")
-    
-    # Sync all commands
-    await bot.sync_all_application_commands()
-    print("All commands synchronized.")
-    logger.info("All commands synchronized.")
 
 
 
@@ -136,9 +281,23 @@ add_clash_command(bot)
 # Add mastery command
 add_mastery_command(bot)
 
+# Add stats command
+add_stats_command(bot)
+
 # Add the restart command to the bot
 add_restart_command(bot, GUILD_IDS)
 
+# Add bot stats command (admins only)
+add_botstats_command(bot, GUILD_IDS)
+
+# Add profiler command (owner only)
+add_profile_command(bot, GUILD_IDS)
+
+# Add command sync command (admins only), commands are otherwise only synced when they change
+command_sync.add_sync_command(bot, GUILD_IDS)
+
+_imported = time.perf_counter()  # Everything above ran before we could connect
+
 @bot.event
 async def on_application_command(interaction: nextcord.Interaction):
     """Log slash command usage."""
@@ -163,6 +322,16 @@ async def on_application_command(interaction: nextcord.Interaction):
     except Exception as e:
         logger.error(f"Error logging command invocation: {e}")
 
+@bot.event
+async def on_application_command_error(interaction: nextcord.Interaction, error):
+    """Count and log slash command errors."""
+    command_name = interaction.application_command.name if interaction.application_command else "Unknown"
+    metrics.record_error(command_name)
+    logger.error(
+        f"Error in /{command_name} for {interaction.user}: {error}",
+        exc_info=getattr(error, "original", error),
+    )
+
 @bot.event
 async def on_command_error(ctx, error):
     """Enhanced error logging."""
@@ -194,4 +363,6 @@ async def on_command_error(ctx, error):
     except Exception as e:
         logger.error(f"Error in error handling: {e}")
 
-bot.run(TOKEN)
+# Only when run as a script, so bench.py can import the bot with its commands registered
+if __name__ == "__main__":
+    bot.run(TOKEN)